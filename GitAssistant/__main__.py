@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules import each other as top-level modules (as when main.py is run
+# directly), so make them importable under ``python -m GitAssistant`` too.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
@@ -0,0 +1,368 @@
+# GitAssistant/cli.py
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+
+# Subcommand modules are imported inside their handlers so that a command only
+# pays for what it uses (GitPython is not imported by a plain working tree scan).
+
+EXIT_OK = 0         # Nothing found / operation succeeded
+EXIT_FINDINGS = 1   # Findings, pending .gitignore entries, or an unresolved merge
+EXIT_ERROR = 2      # Bad arguments, or a repository could not be processed
+
+RESULT_QUEUE_SIZE = 1000   # Findings buffered between the --jobs threads and the writer
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+_DONE = object()
+
+class NdjsonWriter:
+    """Writes one JSON object per line, flushed as each record arrives."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def finding(self, repo_path, finding):
+        record = {'repo': repo_path}
+        record.update(finding._asdict())
+        self._write(record)
+
+    def error(self, repo_path, message):
+        self._write({'repo': repo_path, 'error': message})
+
+    def _write(self, record):
+        self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+class SarifWriter:
+    """Writes a single-run SARIF 2.1.0 log, streaming results as they arrive."""
+
+    def __init__(self, stream, rule_names):
+        from urllib.parse import quote
+
+        self.quote = quote
+        self.stream = stream
+        self.count = 0
+        self.errors = []
+        driver = {
+            'name': 'GitAssistant',
+            'rules': [{'id': name, 'shortDescription': {'text': name}} for name in rule_names],
+        }
+        header = json.dumps({'version': '2.1.0', '$schema': SARIF_SCHEMA, 'runs': [{'tool': {'driver': driver}}]})
+        # Reopen the run object so results can be appended one at a time.
+        self.stream.write(header[:-3] + ', "results": [\n')
+
+    def finding(self, repo_path, finding):
+        location = {
+            # URIs must be percent-encoded (spaces, non-ASCII names, '%', '#', ...).
+            'artifactLocation': {'uri': self.quote(finding.path.replace(os.sep, '/'))},
+            'region': {'startLine': finding.line, 'startColumn': finding.column},
+        }
+        result = {
+            'ruleId': finding.rule,
+            'level': 'error',
+            'message': {'text': f"Possible secret matched rule '{finding.rule}'."},
+            'locations': [{'physicalLocation': location}],
+            'properties': {'repository': repo_path},
+        }
+        if getattr(finding, 'commit', None):
+            result['properties']['commit'] = finding.commit
+        self.stream.write((',\n' if self.count else '') + json.dumps(result))
+        self.stream.flush()
+        self.count += 1
+
+    def error(self, repo_path, message):
+        self.errors.append({'message': {'text': f'{repo_path}: {message}'}, 'level': 'error'})
+
+    def close(self):
+        invocation = {'executionSuccessful': not self.errors, 'toolExecutionNotifications': self.errors}
+        self.stream.write(f'\n], "invocations": [{json.dumps(invocation)}]}}]}}\n')
+        self.stream.flush()
+
+class TextWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def finding(self, repo_path, finding):
+        commit = f"{finding.commit[:12]} " if getattr(finding, 'commit', None) else ''
+        self.stream.write(f"{repo_path}: {commit}{finding.path}:{finding.line}:{finding.column} [{finding.rule}]\n")
+        self.stream.flush()
+
+    def error(self, repo_path, message):
+        sys.stderr.write(f"{repo_path}: error: {message}\n")
+
+    def close(self):
+        pass
+
+def _make_writer(output_format, stream):
+    if output_format == 'sarif':
+        from detectors import engine_rule_names
+        from scanner import ENGINE
+        return SarifWriter(stream, engine_rule_names(ENGINE))
+    if output_format == 'ndjson':
+        return NdjsonWriter(stream)
+    return TextWriter(stream)
+
+def _iter_repo_findings(repo_path, args):
+    """Yield repo-relative findings for one repository according to the scan flags."""
+    findings = None
+    if not args.no_cache and os.path.exists(os.path.join(repo_path, '.git')):
+        import sqlite3
+        from git import InvalidGitRepositoryError
+        from incremental import iter_incremental_findings
+        try:
+            findings = iter_incremental_findings(repo_path, workers=args.workers, use_processes=args.processes,
+                                                 max_file_size=args.max_file_size)
+            # The repository and its cache are opened on the first next(); a
+            # broken .git, or one the cache cannot be written to (a read-only
+            # checkout), falls back to a plain scan.
+            first = next(findings, None)
+            if first is not None:
+                findings = itertools.chain([first], findings)
+        except (InvalidGitRepositoryError, OSError, sqlite3.Error):
+            findings = None
+    if findings is None:
+        from scanner import iter_findings
+        findings = iter_findings(repo_path, workers=args.workers, use_processes=args.processes,
+                                 max_file_size=args.max_file_size)
+    for finding in findings:
+        yield finding._replace(path=os.path.relpath(finding.path, repo_path))
+
+    if args.history:
+        from history import iter_history_findings
+        from metrics import METRICS
+        yield from METRICS.timed_iter('scan.history', iter_history_findings(
+            repo_path, workers=args.workers or 1, max_file_size=args.max_file_size))
+
+def _iter_results(repo_path, args):
+    """Yield the findings of one repository, then the exception that stopped it, if any."""
+    try:
+        if not os.path.isdir(repo_path):
+            raise OSError("not a directory")
+        yield from _iter_repo_findings(repo_path, args)
+    except Exception as e:
+        yield e if str(e) else RuntimeError(type(e).__name__)
+
+def _scan_into(repo_path, args, results, cancel):
+    try:
+        for item in _iter_results(repo_path, args):
+            if cancel.is_set():
+                return
+            results.put((repo_path, item))
+    finally:
+        results.put((repo_path, _DONE))
+
+def _iter_pooled_results(args):
+    """
+    Yield (repo, finding or exception) from up to args.jobs repositories scanned at once.
+
+    When the generator is closed early (e.g. the output pipe was closed),
+    scans not yet started are cancelled and running ones stop at their next
+    finding; the queue is drained meanwhile so none stays blocked on it.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    results = queue.Queue(maxsize=RESULT_QUEUE_SIZE)
+    cancel = threading.Event()
+    remaining = len(args.repos)
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(_scan_into, repo_path, args, results, cancel) for repo_path in args.repos]
+        try:
+            while remaining:
+                repo_path, item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                else:
+                    yield repo_path, item
+        finally:
+            if remaining:
+                cancel.set()
+                # A cancelled scan never runs, so never reports _DONE.
+                remaining -= sum(future.cancel() for future in futures)
+                while remaining:
+                    if results.get()[1] is _DONE:
+                        remaining -= 1
+
+def run_scan(args, stream=sys.stdout):
+    """Scan every repository, args.jobs at a time, writing findings as they arrive."""
+    if args.jobs > 1:
+        results = _iter_pooled_results(args)
+    else:
+        # One repository at a time is scanned in this thread, where --cprofile sees it.
+        results = ((repo_path, item) for repo_path in args.repos for item in _iter_results(repo_path, args))
+    writer = _make_writer(args.format, stream)
+    found = False
+    failed = False
+    try:
+        for repo_path, item in results:
+            if isinstance(item, Exception):
+                failed = True
+                writer.error(repo_path, str(item))
+            else:
+                found = True
+                writer.finding(repo_path, item)
+    finally:
+        # Stop the scans now if writing failed, rather than when the traceback is freed.
+        results.close()
+    writer.close()
+    if failed:
+        return EXIT_ERROR
+    return EXIT_FINDINGS if found else EXIT_OK
+
+def run_diff(args, stream=sys.stdout):
+    """Scan only the lines being committed, for use as a pre-commit hook."""
+    from diff_scan import DiffError, iter_diff_findings
+
+    writer = _make_writer(args.format, stream)
+    found = False
+    status = EXIT_OK
+    try:
+        for finding in iter_diff_findings(args.repo, args.range):
+            found = True
+            writer.finding(args.repo, finding)
+    except (OSError, DiffError) as e:
+        writer.error(args.repo, str(e))
+        status = EXIT_ERROR
+    writer.close()
+    if status == EXIT_OK and found:
+        status = EXIT_FINDINGS
+    return status
+
+def run_gitignore(args, stream=sys.stdout):
+    """Report .gitignore suggestions for each repository, appending them with --write."""
+    from git_ignore_manager import append_entries, iter_unignored_files, suggest_entries
+
+    status = EXIT_OK
+    for repo_path in args.repos:
+        if not os.path.isdir(repo_path):
+            sys.stderr.write(f"{repo_path}: error: not a directory\n")
+            status = EXIT_ERROR
+            continue
+        entries = suggest_entries(iter_unignored_files(repo_path))
+        for entry, count in entries:
+            if args.format == 'ndjson':
+                stream.write(json.dumps({'repo': repo_path, 'entry': entry, 'files': count}) + '\n')
+            else:
+                stream.write(f"{repo_path}: {entry} ({count} file{'s' if count != 1 else ''})\n")
+        if entries and args.write:
+            append_entries(repo_path, entries)
+        elif entries and status == EXIT_OK:
+            status = EXIT_FINDINGS
+    return status
+
+def _parse_strategy(value):
+    glob, sep, strategy = value.rpartition('=')
+    if not sep or strategy not in ('ours', 'theirs', 'union'):
+        raise argparse.ArgumentTypeError("expected GLOB=ours|theirs|union")
+    return glob, strategy
+
+def run_merge(args, stream=sys.stdout):
+    """Merge a branch without prompting; conflicts no strategy covers abort the merge."""
+    from merge_helper import MERGE_ERROR, MERGED, merge_branches
+
+    if not os.path.isdir(args.repo):
+        sys.stderr.write(f"{args.repo}: error: not a directory\n")
+        return EXIT_ERROR
+    status = merge_branches(args.repo, args.branch, interactive=False, strategies=args.strategy)
+    if status == MERGE_ERROR:
+        return EXIT_ERROR
+    return EXIT_OK if status == MERGED else EXIT_FINDINGS
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='GitAssistant', description="Scan repositories for secrets and manage merges.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    profiling = argparse.ArgumentParser(add_help=False)
+    profiling.add_argument('--profile', action='store_true',
+                           help="Write phase timers, counters and the slowest files, detectors and git calls "
+                                "to stderr as JSON")
+    profiling.add_argument('--profile-file', metavar='FILE', help="Write the --profile JSON to FILE instead")
+    profiling.add_argument('--cprofile', metavar='FILE',
+                           help="Write cProfile stats to FILE (read with pstats); the work runs in one thread")
+
+    scan = commands.add_parser('scan', parents=[profiling], help="Scan repositories for sensitive data")
+    scan.add_argument('repos', nargs='+', metavar='REPO')
+    scan.add_argument('--format', choices=['text', 'ndjson', 'sarif'], default='text')
+    scan.add_argument('--output', '-o', help="Write results to this file instead of stdout")
+    scan.add_argument('--jobs', '-j', type=int, default=4, help="Repositories scanned at once (default: 4)")
+    scan.add_argument('--workers', type=int, default=None,
+                      help="Scan workers per repository (default: one per CPU)")
+    scan.add_argument('--processes', action='store_true', help="Use a process pool instead of threads")
+    scan.add_argument('--max-file-size', type=int, default=100 * 1024 * 1024, help="Skip larger files (bytes)")
+    scan.add_argument('--no-cache', action='store_true', help="Rescan every file instead of only changed blobs")
+    scan.add_argument('--history', action='store_true', help="Also scan every blob in the commit history")
+    scan.set_defaults(handler=run_scan)
+
+    diff = commands.add_parser('diff', parents=[profiling], help="Scan only added lines of the staged changes or a commit range")
+    diff.add_argument('repo', nargs='?', default='.', metavar='REPO')
+    diff.add_argument('--range', help="Commit range to scan instead of the index, e.g. main..HEAD")
+    diff.add_argument('--format', choices=['text', 'ndjson', 'sarif'], default='text')
+    diff.add_argument('--output', '-o', help="Write results to this file instead of stdout")
+    diff.set_defaults(handler=run_diff)
+
+    gitignore = commands.add_parser('gitignore', parents=[profiling], help="Suggest .gitignore entries for sensitive files")
+    gitignore.add_argument('repos', nargs='+', metavar='REPO')
+    gitignore.add_argument('--write', action='store_true', help="Append the suggestions to .gitignore")
+    gitignore.add_argument('--format', choices=['text', 'ndjson'], default='text')
+    gitignore.set_defaults(handler=run_gitignore)
+
+    merge = commands.add_parser('merge', parents=[profiling], help="Merge a branch into the current branch")
+    merge.add_argument('repo', metavar='REPO')
+    merge.add_argument('branch', metavar='BRANCH')
+    merge.add_argument('--strategy', action='append', type=_parse_strategy, default=[], metavar='GLOB=STRATEGY',
+                       help="Resolve conflicts in matching paths with ours, theirs or union; first match wins")
+    merge.set_defaults(handler=run_merge)
+    return parser
+
+def _run(args):
+    if getattr(args, 'output', None):
+        with open(args.output, 'w') as stream:
+            return args.handler(args, stream)
+    return args.handler(args)
+
+def _run_profiled(args):
+    """Run a command with metrics and/or cProfile enabled, then write what they collected."""
+    from metrics import METRICS
+
+    write_metrics = args.profile or args.profile_file
+    if write_metrics:
+        METRICS.reset()
+        METRICS.enable()
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        # cProfile only sees the thread that enabled it, so scan without pools.
+        for name in ('jobs', 'workers'):
+            if hasattr(args, name):
+                setattr(args, name, 1)
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with METRICS.phase('total'):
+            return _run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        if write_metrics:
+            METRICS.disable()
+            report = json.dumps(dict(command=args.command, **METRICS.report()), indent=2) + '\n'
+            if args.profile_file:
+                with open(args.profile_file, 'w') as f:
+                    f.write(report)
+            else:
+                sys.stderr.write(report)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile or args.profile_file or args.cprofile:
+        return _run_profiled(args)
+    return _run(args)
@@ -0,0 +1,170 @@
+# GitAssistant/conflict_resolver.py
+
+import fnmatch
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+CONFLICT_START = '<<<<<<<'
+CONFLICT_BASE = '|||||||'
+CONFLICT_MID = '======='
+CONFLICT_END = '>>>>>>>'
+
+# base is None unless the file was written with merge.conflictStyle=diff3 (or zdiff3).
+ConflictHunk = namedtuple('ConflictHunk', ['ours', 'base', 'theirs'])
+Resolution = namedtuple('Resolution', ['path', 'hunks', 'resolved'])
+
+class ConflictParseError(ValueError):
+    pass
+
+def _is_marker(line, marker):
+    """Markers are the 7 characters alone or followed by a space and a label."""
+    if not line.startswith(marker):
+        return False
+    rest = line[len(marker):]
+    return not rest.strip('\r\n') or rest[0] == ' '
+
+def _is_leftover(line):
+    """True for a start, base or end marker; '=======' alone is common in ordinary text."""
+    return (line.startswith(('<<<<<<<', '|||||||', '>>>>>>>'))
+            and any(_is_marker(line, marker) for marker in (CONFLICT_START, CONFLICT_BASE, CONFLICT_END)))
+
+def parse_conflicts(lines):
+    """
+    Splits merged file content into plain lines and conflict hunks in one pass.
+
+    Hunks must follow git's marker sequence: start, optional base, separator,
+    end. A marker out of that order (e.g. a second start marker inside a
+    hunk) means the file holds marker-like text git did not write, and
+    raises ConflictParseError rather than guessing.
+
+    :param lines: Iterable of lines, e.g. an open file
+    :return: Generator yielding each plain line as a str and each conflict as a ConflictHunk
+    """
+    section = None
+    ours = base = theirs = None
+    for number, line in enumerate(lines, start=1):
+        if section is None:
+            if _is_marker(line, CONFLICT_START):
+                section, ours, base, theirs = 'ours', [], None, []
+            else:
+                yield line
+        elif section in ('ours', 'base') and line.rstrip('\r\n') == CONFLICT_MID:
+            section = 'theirs'
+        elif section == 'ours' and _is_marker(line, CONFLICT_BASE):
+            section, base = 'base', []
+        elif section == 'theirs' and _is_marker(line, CONFLICT_END):
+            yield ConflictHunk(ours, base, theirs)
+            section = None
+        elif _is_leftover(line):
+            raise ConflictParseError(f"line {number}: unexpected conflict marker {line.rstrip()!r}")
+        elif section == 'ours':
+            ours.append(line)
+        elif section == 'base':
+            base.append(line)
+        else:
+            theirs.append(line)
+    if section is not None:
+        raise ConflictParseError("unterminated conflict block")
+
+def _ours(hunk):
+    return hunk.ours
+
+def _theirs(hunk):
+    return hunk.theirs
+
+def _union(hunk):
+    # Same as git's built-in union driver: our lines, then theirs.
+    return hunk.ours + hunk.theirs
+
+STRATEGIES = {
+    'ours': _ours,
+    'theirs': _theirs,
+    'union': _union,
+}
+
+def strategy_for(path, strategies):
+    """
+    Return the resolver for a repository-relative path.
+
+    :param strategies: List of (glob, strategy) pairs, first match wins; a
+                       strategy is a name from STRATEGIES or a callable taking
+                       a ConflictHunk and returning the lines to keep, or None
+                       to leave that hunk unresolved
+    """
+    for glob, strategy in strategies or ():
+        if fnmatch.fnmatch(path, glob) or fnmatch.fnmatch(os.path.basename(path), glob):
+            return STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    return None
+
+def resolve_file(file_path, resolver=None, fallback=None):
+    """
+    Resolves every conflict hunk in a file and atomically replaces it.
+
+    Each hunk goes to resolver, then to fallback if the resolver is missing or
+    returns None. If any hunk stays unresolved, or the result would still
+    contain a conflict marker, the file is left untouched.
+    Output is streamed to a temporary file in the same directory and renamed
+    over the original, so a crash never leaves a half-written file.
+
+    :return: Resolution(path, number of hunks, whether the file was rewritten)
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.gitassistant-')
+    hunks = 0
+    resolved = True
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape', newline='') as source, \
+                os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape', newline='') as target:
+            for item in parse_conflicts(source):
+                if isinstance(item, str):
+                    lines = [item]
+                else:
+                    hunks += 1
+                    lines = resolver(item) if resolver else None
+                    if lines is None and fallback:
+                        lines = fallback(item)
+                if lines is None or any(map(_is_leftover, lines)):
+                    resolved = False
+                    break
+                target.writelines(lines)
+        if not resolved or not hunks:
+            os.remove(temp_path)
+            return Resolution(file_path, hunks, False)
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+        return Resolution(file_path, hunks, True)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def resolve_unmerged(repo, strategies=None, fallback=None, workers=None):
+    """
+    Resolves every unmerged file in the index.
+
+    Files are first resolved in parallel using only the configured strategies;
+    files with hunks no strategy handled are then retried one at a time with
+    fallback (e.g. an interactive prompt), if one is given.
+
+    :return: List of Resolutions, keyed by repository-relative path
+    """
+    root = repo.working_tree_dir
+    paths = [path for path in repo.index.unmerged_blobs() if os.path.isfile(os.path.join(root, path))]
+
+    def resolve(path, use_fallback):
+        try:
+            resolution = resolve_file(os.path.join(root, path), strategy_for(path, strategies),
+                                      fallback if use_fallback else None)
+        except ConflictParseError:
+            # Marker-like text git did not write; leave the file for a human.
+            return Resolution(path, 0, False)
+        return resolution._replace(path=path)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        resolutions = list(executor.map(lambda path: resolve(path, False), paths))
+    if fallback:
+        resolutions = [r if r.resolved else resolve(r.path, True) for r in resolutions]
+    return resolutions
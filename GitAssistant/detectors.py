@@ -0,0 +1,314 @@
+# GitAssistant/detectors.py
+
+import bisect
+import math
+import re
+from collections import Counter, namedtuple
+
+# name -> factory taking the per-rule allowlist and returning a detector. A detector has
+# ``rule_names``, a ``signature`` string that changes whenever its results
+# could, and ``finditer(text, pos)`` yielding (rule, start, end) in start order.
+DETECTORS = {}
+
+# names holds the registry name of each detector, used to label its metrics.
+Engine = namedtuple('Engine', ['detectors', 'names'], defaults=(None,))
+
+def register_detector(name):
+    """Decorator registering a detector factory under name."""
+    def decorator(factory):
+        DETECTORS[name] = factory
+        return factory
+    return decorator
+
+def build_engine(names, allowlist=None):
+    """
+    Instantiate the registered detectors called names, in order.
+
+    :param allowlist: Mapping of rule name to patterns; a match containing any is dropped
+    """
+    return Engine(tuple(DETECTORS[name](allowlist) for name in names), tuple(names))
+
+def engine_rule_names(engine):
+    return [name for detector in engine.detectors for name in detector.rule_names]
+
+def engine_signature(engine):
+    return '\0'.join(detector.signature for detector in engine.detectors)
+
+def compile_allowlist(allowlist):
+    """Compile {rule: [pattern, ...]} into {rule: regex} matching any of the patterns."""
+    return {rule: re.compile('|'.join(f'(?:{p})' for p in patterns)) for rule, patterns in (allowlist or {}).items()}
+
+class RegexDetector:
+    """
+    Matches many regex rules with one precompiled alternation.
+
+    Each rule becomes a named group, so ``match.lastgroup`` is the rule name.
+    When every rule has anchors (lowercase literals that must appear on the
+    line where any of its matches starts), the regex only runs on lines
+    containing an anchor, found with str.find on the lowercased text. A
+    match may run on through the next non-blank line, as in a wrapped
+    ``API_KEY =\n    "..."``.
+    """
+
+    def __init__(self, rules, rule_anchors=None, allowlist=None):
+        """
+        :param rules: List of (name, pattern, flags) tuples
+        :param rule_anchors: Mapping of rule name to lowercase literals
+        :param allowlist: Mapping of rule name to patterns; a match containing any is dropped
+        """
+        rule_anchors = rule_anchors or {}
+        groups = []
+        anchors = set()
+        for name, pattern, flags in rules:
+            if flags & re.IGNORECASE:
+                pattern = f'(?i:{pattern})'
+            groups.append(f'(?P<{name}>{pattern})')
+            if anchors is not None and rule_anchors.get(name):
+                anchors.update(rule_anchors[name])
+            else:
+                anchors = None
+        self.rule_names = [name for name, _, _ in rules]
+        self.regex = re.compile('|'.join(groups))
+        self.anchors = tuple(sorted(anchors)) if anchors is not None else None
+        self.allowlist = compile_allowlist({rule: patterns for rule, patterns in (allowlist or {}).items()
+                                            if rule in self.rule_names})
+        allowed = ''.join(f'\0{rule}:{regex.pattern}' for rule, regex in sorted(self.allowlist.items()))
+        self.signature = f'regex:{self.regex.pattern}:{self.regex.flags}{allowed}'
+
+    _non_blank = re.compile(r'\S')
+
+    def _candidate_lines(self, text, lowered):
+        """
+        Return sorted (start, end, stop) spans of the lines containing any anchor literal.
+
+        stop is the end of the next non-blank line, which a match starting on
+        the line may run into.
+        """
+        spans = set()
+        for anchor in self.anchors:
+            pos = lowered.find(anchor)
+            while pos != -1:
+                start = text.rfind('\n', 0, pos) + 1
+                end = text.find('\n', pos)
+                if end == -1:
+                    end = stop = len(text)
+                else:
+                    following = self._non_blank.search(text, end)
+                    stop = text.find('\n', following.start()) if following else len(text)
+                    if stop == -1:
+                        stop = len(text)
+                spans.add((start, end, stop))
+                pos = lowered.find(anchor, end)
+        return sorted(spans)
+
+    def _matches(self, text, pos):
+        lowered = text.lower() if self.anchors is not None else None
+        # Some characters change length when lowercased, which would shift the
+        # anchor offsets, so such text takes the full regex pass instead.
+        if lowered is None or len(lowered) != len(text):
+            yield from self.regex.finditer(text, pos)
+            return
+        for start, end, stop in self._candidate_lines(text, lowered):
+            if end < pos:
+                continue
+            # Matches starting past end belong to a later line's span.
+            for match in self.regex.finditer(text, max(start, pos), stop):
+                if match.start() > end:
+                    break
+                yield match
+                pos = match.end()
+
+    def finditer(self, text, pos=0):
+        for match in self._matches(text, pos):
+            rule = match.lastgroup
+            allowed = self.allowlist.get(rule)
+            if allowed is not None and allowed.search(match.group()):
+                continue
+            yield rule, match.start(), match.end()
+
+# Token formats issued by specific providers. Anchors are lowercase.
+PROVIDER_RULES = {
+    'aws_access_key_id': (r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b', ('akia', 'asia')),
+    'github_token': (r'\bgh[pousr]_[A-Za-z0-9]{36,255}\b', ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_')),
+    'github_fine_grained_token': (r'\bgithub_pat_[A-Za-z0-9_]{82}\b', ('github_pat_',)),
+    'gitlab_token': (r'\bglpat-[A-Za-z0-9_\-]{20}\b', ('glpat-',)),
+    'slack_token': (r'\bxox[abposr]-[A-Za-z0-9\-]{10,72}', ('xox',)),
+    'stripe_secret_key': (r'\b[rs]k_live_[A-Za-z0-9]{24,99}\b', ('k_live_',)),
+    'google_api_key': (r'\bAIza[0-9A-Za-z_\-]{35}', ('aiza',)),
+}
+
+@register_detector('providers')
+def provider_detector(allowlist=None):
+    rules = [(name, pattern, 0) for name, (pattern, _) in PROVIDER_RULES.items()]
+    anchors = {name: literals for name, (_, literals) in PROVIDER_RULES.items()}
+    return RegexDetector(rules, anchors, allowlist)
+
+_numpy = None
+
+def _load_numpy():
+    """Import NumPy on first use so startup does not pay for it; False if unavailable."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+ENTROPY_BATCH = 4096    # Tokens per histogram matrix (4096 x 128 counts)
+ENTROPY_VECTOR_MIN = 64 # Fewer tokens are cheaper to score in plain Python
+
+def _entropy_python(token):
+    length = len(token)
+    return -sum(count / length * math.log2(count / length) for count in Counter(token).values())
+
+def shannon_entropy(tokens):
+    """
+    Return the Shannon entropy in bits per character of each ASCII token.
+
+    With NumPy, a whole batch is scored at once: the bytes of all tokens are
+    binned into one tokens x 128 histogram with a single bincount, and the
+    entropy of every row is computed with array operations. NumPy is
+    optional; without it, or for small batches, tokens are scored one by one.
+    """
+    np = _load_numpy() if len(tokens) >= ENTROPY_VECTOR_MIN else None
+    if not np:
+        return [_entropy_python(token) for token in tokens]
+    scores = []
+    for i in range(0, len(tokens), ENTROPY_BATCH):
+        batch = tokens[i:i + ENTROPY_BATCH]
+        data = np.frombuffer(''.join(batch).encode('ascii'), dtype=np.uint8)
+        lengths = np.fromiter(map(len, batch), dtype=np.int64, count=len(batch))
+        rows = np.repeat(np.arange(len(batch), dtype=np.int64), lengths)
+        counts = np.bincount(rows * 128 + data, minlength=len(batch) * 128).reshape(len(batch), 128)
+        p = counts / lengths[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            terms = np.where(counts > 0, p * np.log2(p), 0.0)
+        scores.extend((-terms.sum(axis=1)).tolist())
+    return scores
+
+TOKEN_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=_-')
+
+# Maps token characters to 'a' and every other ASCII character to ' '.
+# Non-ASCII characters are left as they are, so offsets are preserved.
+_TOKEN_MASK = {i: 'a' if chr(i) in TOKEN_CHARS else ' ' for i in range(128)}
+
+PEM_BOUNDARY = re.compile(r'-----(BEGIN|END) ([A-Z0-9 ]+)-----')
+
+def public_pem_spans(text):
+    """
+    Return sorted (start, end) spans of the PEM blocks in text that hold public material.
+
+    Certificates, public keys, CRLs, parameters and the like are base64 of
+    high entropy on every line, yet not secret. Blocks labelled PRIVATE are
+    not included. text may be one chunk of a larger file, so a block with no
+    END runs to the end of text, and an END with no BEGIN closes a block
+    running from the previous boundary (or the start of text). Only a
+    block longer than a whole scan chunk goes unrecognised in its middle.
+    """
+    if text.find('-----BEGIN ') == -1 and text.find('-----END ') == -1:
+        return []
+    spans = []
+    start = None
+    boundary = 0
+    for match in PEM_BOUNDARY.finditer(text):
+        kind, label = match.groups()
+        if 'PRIVATE' in label:
+            boundary = match.end()
+            continue
+        if kind == 'BEGIN':
+            if start is None:
+                start = match.start()
+        else:
+            spans.append((boundary if start is None else start, match.end()))
+            start = None
+            boundary = match.end()
+    if start is not None:
+        spans.append((start, len(text)))
+    return spans
+
+# The host and path of a URL; userinfo and the query string are left out.
+URL_PATH = re.compile(r'://(?:[^\s/?#@\'"]*@)?([^\s\'"<>()?#]+)')
+
+def url_path_spans(text):
+    """
+    Return sorted (start, end) spans of the host and path of every URL in text.
+
+    Paths like ``github.com/python/cpython/blob/<sha>/Lib`` are long runs of
+    token characters, but credentials are passed in userinfo or the query
+    string, which the spans exclude.
+    """
+    if text.find('://') == -1:
+        return []
+    return [match.span(1) for match in URL_PATH.finditer(text)]
+
+class EntropyDetector:
+    """
+    Flags long base64-like tokens mixing letters and digits whose entropy is high.
+
+    Hex tokens are never flagged: at most 4 bits per character, they stay
+    below any threshold over 4.0. That is deliberate, as commit SHAs and
+    content hashes would otherwise flood the results; hex secrets need a
+    RegexDetector rule with context. Tokens inside public PEM blocks
+    (see public_pem_spans) are skipped as well, and so are paths: tokens in
+    a URL host or path (see url_path_spans), and tokens split by '/' into
+    parts all shorter than min_length, like ``en-us/library/desktop/ms684961``.
+    """
+
+    rule = 'high_entropy'
+
+    _run = re.compile('a+')
+    _digit = re.compile(r'\d')
+    _letter = re.compile(r'[A-Za-z]')
+
+    def __init__(self, min_length=24, threshold=4.3, allowlist=None):
+        self.min_length = min_length
+        self.threshold = threshold
+        self.rule_names = [self.rule]
+        self.allowlist = compile_allowlist(allowlist).get(self.rule)
+        allowed = self.allowlist.pattern if self.allowlist is not None else ''
+        self.signature = f'entropy:{min_length}:{threshold}:{allowed}:public-pem:paths:urls'
+
+    def _tokens(self, text, pos):
+        """
+        Yield (start, end) of every run of at least min_length token characters.
+
+        A regex like ``[A-Za-z0-9+/=_-]{24,}`` retries from every character of
+        every shorter word; masking the text with str.translate and searching
+        for min_length 'a's with str.find skips them in C instead.
+        """
+        mask = text.translate(_TOKEN_MASK)
+        needle = 'a' * self.min_length
+        start = mask.find(needle, pos)
+        while start != -1:
+            end = self._run.match(mask, start).end()
+            yield start, end
+            start = mask.find(needle, end)
+
+    def finditer(self, text, pos=0):
+        spans = []
+        tokens = []
+        skipped = sorted(public_pem_spans(text) + url_path_spans(text))
+        skipped_starts = [start for start, _ in skipped]
+        for start, end in self._tokens(text, pos):
+            if skipped:
+                i = bisect.bisect_right(skipped_starts, start) - 1
+                if i >= 0 and start < skipped[i][1]:
+                    continue
+            token = text[start:end]
+            if not self._digit.search(token) or not self._letter.search(token):
+                continue
+            if '/' in token and max(map(len, token.split('/'))) < self.min_length:
+                continue
+            if self.allowlist is not None and self.allowlist.search(token):
+                continue
+            spans.append((start, end))
+            tokens.append(token)
+        for (start, end), score in zip(spans, shannon_entropy(tokens)):
+            if score >= self.threshold:
+                yield self.rule, start, end
+
+@register_detector('entropy')
+def entropy_detector(allowlist=None):
+    return EntropyDetector(allowlist=allowlist)
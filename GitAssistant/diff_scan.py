@@ -0,0 +1,130 @@
+# GitAssistant/diff_scan.py
+
+import re
+import subprocess
+from metrics import METRICS
+from scanner import ENGINE, Finding, scan_text
+
+# This module runs as a pre-commit hook, where startup dominates: it talks to
+# git through one plain subprocess instead of GitPython, and only imports the
+# scanner, never the walker pools or the incremental cache.
+
+class DiffError(RuntimeError):
+    pass
+
+HUNK_HEADER = re.compile(r'@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+C_ESCAPE = re.compile(rb'\\([0-7]{3}|.)')
+C_ESCAPES = {b'a': b'\a', b'b': b'\b', b't': b'\t', b'n': b'\n', b'v': b'\v', b'f': b'\f', b'r': b'\r'}
+
+def unquote_path(quoted):
+    """
+    Undo git's C-style quoting of a path, e.g. ``"b/tab\\there.txt"``.
+
+    Octal escapes are bytes of the UTF-8 encoded name, so unescaping is done
+    on bytes.
+    """
+    def unescape(match):
+        code = match.group(1)
+        if len(code) == 3:
+            return bytes((int(code, 8),))
+        return C_ESCAPES.get(code, code)
+    return C_ESCAPE.sub(unescape, quoted[1:-1].encode('utf-8')).decode('utf-8', errors='replace')
+
+def target_path(line):
+    """
+    Return the path named by a ``+++`` line, or None for /dev/null.
+
+    git ends the line with a TAB when the path contains a space, and quotes
+    paths holding a double quote, a backslash or a control character.
+    """
+    target = line[4:].rstrip('\n')
+    if target.endswith('\t'):
+        target = target[:-1]
+    if target.startswith('"'):
+        target = unquote_path(target)
+    return target[2:] if target.startswith('b/') else None
+
+def diff_command(repo_path, commit_range=None):
+    """
+    Return the git command producing a zero-context diff of what is being committed.
+
+    The prefixes are given explicitly, as target_path expects ``b/`` whatever
+    diff.noprefix or diff.mnemonicPrefix say.
+
+    :param commit_range: None for the staged changes, otherwise e.g. 'main..HEAD'
+    """
+    command = ['git', '-C', repo_path, '-c', 'core.quotePath=false', 'diff',
+               '--no-color', '--no-ext-diff', '--src-prefix=a/', '--dst-prefix=b/', '-U0', '--diff-filter=ACMR']
+    if commit_range:
+        command.append(commit_range)
+    else:
+        command.append('--cached')
+    return command
+
+def iter_added_lines(lines):
+    """
+    Parses a unified diff in one pass.
+
+    :param lines: Iterable of diff lines (str)
+    :return: Generator of (path, line number in the new file, text) for each added line
+    """
+    path = None
+    new_line = 0
+    in_hunk = False
+    for line in lines:
+        if line.startswith('diff --git '):
+            path = None
+            in_hunk = False
+        elif not in_hunk and line.startswith('+++ '):
+            path = target_path(line)
+        elif line.startswith('@@'):
+            match = HUNK_HEADER.match(line)
+            if match:
+                new_line = int(match.group(1))
+                in_hunk = True
+        elif in_hunk and path is not None:
+            if line.startswith('+'):
+                yield path, new_line, line[1:].rstrip('\n')
+                new_line += 1
+            elif line.startswith(' '):
+                new_line += 1
+
+def _scan_added(path, added, engine):
+    """Scan one file's added lines as a single buffer and map findings back to file lines."""
+    METRICS.count('lines_added', len(added))
+    numbers = [number for number, _ in added]
+    text = '\n'.join(content for _, content in added)
+    for finding in scan_text(text, path, engine):
+        yield Finding(path, finding.rule, numbers[finding.line - 1], finding.column)
+
+def iter_diff_findings(repo_path, commit_range=None, engine=ENGINE):
+    """
+    Yields Findings for the lines a commit adds, streamed from ``git diff``.
+
+    Removed and context lines are never scanned. Each finding reports the
+    line number in the new version of the file.
+    """
+    with METRICS.git_call(('diff', commit_range or '--cached')):
+        yield from _iter_process_findings(diff_command(repo_path, commit_range), engine)
+
+def _iter_process_findings(command, engine):
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        lines = (raw.decode('utf-8', errors='replace') for raw in process.stdout)
+        current = None
+        added = []
+        for path, number, content in iter_added_lines(lines):
+            if path != current:
+                if added:
+                    yield from _scan_added(current, added, engine)
+                current, added = path, []
+            added.append((number, content))
+        if added:
+            yield from _scan_added(current, added, engine)
+    finally:
+        process.stdout.close()
+        errors = process.stderr.read().decode('utf-8', errors='replace').strip()
+        process.stderr.close()
+        status = process.wait()
+    if status != 0:
+        raise DiffError(errors.splitlines()[0] if errors else f"git diff exited with status {status}")
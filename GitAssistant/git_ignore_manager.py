@@ -1,37 +1,115 @@
 
 import os
-import re
-from utils import COMPILED_FILE_PATTERNS
+from collections import Counter
+from metrics import METRICS
+from scanner import walk_files
+from utils import COMPILED_FILE_PATTERN
 
-def update_gitignore(repo_path):
+MIN_COLLAPSE_FILES = 3   # Files needed before a directory or glob entry replaces them
+GITIGNORE_SPECIAL = frozenset('[]*?!#\\')
+
+def escape_path(path):
+    """
+    Escape a literal path for use in a .gitignore entry.
+
+    Glob characters, a leading '!' or '#' and trailing spaces would
+    otherwise change what the entry matches.
+    """
+    escaped = ''.join('\\' + c if c in GITIGNORE_SPECIAL else c for c in path)
+    stripped = escaped.rstrip(' ')
+    return stripped + '\\ ' * (len(escaped) - len(stripped))
+
+def _glob_key(relative_path):
+    """Return the glob a file would be ignored by: '*.ext', or its bare name."""
+    name = relative_path[relative_path.rfind('/') + 1:]
+    dot = name.rfind('.')
+    if dot > 0:
+        return '*' + name[dot:]
+    return name
+
+def _ancestors(directory):
+    """Yield directory and each of its parents, deepest first, excluding the root."""
+    while directory:
+        yield directory
+        directory = directory.rpartition('/')[0]
+
+def suggest_entries(relative_paths, pattern=COMPILED_FILE_PATTERN, min_files=MIN_COLLAPSE_FILES):
+    """
+    Picks .gitignore entries covering every sensitive file.
+
+    Files sharing a glob collapse into that glob when every file it would
+    match is sensitive; otherwise files collapse into the topmost directory
+    whose files are all sensitive. Anything left is listed individually.
 
-    gitignore_path = os.path.join(repo_path, '.gitignore')
-    existing_patterns = []
-    if os.path.exists(gitignore_path):
-        with open(gitignore_path, 'r') as gitignore_file:
-            existing_patterns = gitignore_file.read().splitlines()
+    :param relative_paths: Iterable of '/' separated paths that are not already ignored,
+                           consumed once, so a lazy tree walk works
+    :param pattern: Compiled regex matching sensitive file paths
+    :return: List of (entry, number of files covered), sorted by entry; entries
+             are escaped (see escape_path) and can be written as they are
+    """
+    relative_paths = list(relative_paths)
+    with METRICS.phase('gitignore.match'):
+        candidates = [path for path in relative_paths if pattern.search(path)]
+    METRICS.count('gitignore_paths', len(relative_paths))
+    METRICS.count('gitignore_candidates', len(candidates))
+    with METRICS.phase('gitignore.collapse'):
+        return _collapse(relative_paths, candidates, min_files)
 
-    files_to_ignore = []
+def _collapse(relative_paths, candidates, min_files):
+    """Group the sensitive candidates into entries; see suggest_entries."""
+    glob_totals = Counter(map(_glob_key, relative_paths))
+    dir_totals = Counter(path.rpartition('/')[0] for path in relative_paths)
+    dir_hits = Counter(path.rpartition('/')[0] for path in candidates)
+
+    # Roll per-directory counts up into every ancestor, visiting each directory once.
+    for directory in list(dir_totals):
+        for ancestor in _ancestors(directory):
+            dir_totals[ancestor] += 0
+    for directory in sorted(dir_totals, key=lambda d: d.count('/'), reverse=True):
+        if directory:
+            parent = directory.rpartition('/')[0]
+            dir_totals[parent] += dir_totals[directory]
+            if directory in dir_hits:
+                dir_hits[parent] += dir_hits[directory]
+
+    glob_hits = Counter(_glob_key(path) for path in candidates)
+    entries = Counter()
+    for path in candidates:
+        glob = _glob_key(path)
+        if glob_hits[glob] >= min_files and glob_hits[glob] == glob_totals[glob]:
+            entries['*' + escape_path(glob[1:]) if glob.startswith('*') else escape_path(glob)] += 1
+            continue
+        full = [d for d in _ancestors(path.rpartition('/')[0])
+                if dir_hits[d] >= min_files and dir_hits[d] == dir_totals[d]]
+        if full:
+            entries[f'/{escape_path(full[-1])}/'] += 1
+        else:
+            entries[f'/{escape_path(path)}'] += 1
+    return sorted(entries.items())
+
+def iter_unignored_files(repo_path):
+    """Yield the '/' separated relative path of every file .gitignore does not already ignore."""
+    for full_path in METRICS.timed_iter('gitignore.walk', walk_files(repo_path, skip_dirs={'.git'})):
+        yield os.path.relpath(full_path, repo_path).replace(os.sep, '/')
+
+def append_entries(repo_path, entries):
+    """Append (entry, count) suggestions to the repository's .gitignore."""
+    with open(os.path.join(repo_path, '.gitignore'), 'a') as gitignore_file:
+        for entry, _ in entries:
+            gitignore_file.write(f"\n{entry}")
+
+def update_gitignore(repo_path):
 
-    for pattern in COMPILED_FILE_PATTERNS:
-        regex = pattern
-        for root, dirs, files in os.walk(repo_path):
-            for file in files:
-                relative_path = os.path.relpath(os.path.join(root, file), repo_path)
-                if regex.match(relative_path):
-                    if relative_path not in existing_patterns and relative_path not in files_to_ignore:
-                        files_to_ignore.append(relative_path)
+    entries = suggest_entries(iter_unignored_files(repo_path))
 
-    if files_to_ignore:
-        print("\nThe following files are suggested to be added to .gitignore:")
-        for file in files_to_ignore:
-            print(f" - {file}")
+    if entries:
+        print("\nThe following entries are suggested to be added to .gitignore:")
+        for entry, count in entries:
+            print(f" - {entry} ({count} file{'s' if count != 1 else ''})")
 
         user_input = input("\nDo you want to add these entries to .gitignore? (y/n): ").lower()
         if user_input == 'y':
-            with open(gitignore_path, 'a') as gitignore_file:
-                for file in files_to_ignore:
-                    gitignore_file.write(f"\n{file}")
+            append_entries(repo_path, entries)
             print("Updated .gitignore successfully.")
         else:
             print("No changes made to .gitignore.")
@@ -0,0 +1,134 @@
+# GitAssistant/history.py
+
+from collections import namedtuple
+from git import Repo
+from metrics import METRICS
+from scanner import BATCH_SIZE, ENGINE, HEADER_SIZE, MAX_FILE_SIZE, is_binary, iter_batched, scan_stream
+
+HistoryFinding = namedtuple('HistoryFinding', ['commit', 'path', 'rule', 'line', 'column'])
+
+NULL_SHA = '0' * 40
+SCANNED_MODES = ('100644', '100755')   # Regular files; symlinks and submodules are skipped
+READ_SIZE = 64 * 1024                  # Bytes of ``git log`` output read at a time
+
+def _iter_fields(stream, size=READ_SIZE):
+    """Yield the NUL-terminated fields of a binary stream as they arrive."""
+    pending = b''
+    for chunk in iter(lambda: stream.read(size), b''):
+        fields = (pending + chunk).split(b'\0')
+        pending = fields.pop()
+        yield from fields
+    if pending:
+        yield pending
+
+def iter_history_blobs(repo):
+    """
+    Yields (commit, path, binsha) for every blob reachable from any ref, once per blob.
+
+    A single ``git log --raw -z`` process is streamed, so the object list is
+    never held in memory; only the 20-byte SHAs already seen are. With -z,
+    paths are given verbatim rather than C-quoted. Commits are listed
+    parents first, so each blob is reported with the commit that introduced
+    it rather than a later merge showing it in its diff.
+    """
+    args = ('log', '--all', '--reverse', '--topo-order', '--root', '-m', '--raw', '--no-abbrev', '--no-renames',
+            '-z', '--format=commit %H')
+    with METRICS.git_call(args):
+        yield from _iter_log_blobs(repo.git.log(*args[1:], as_process=True))
+
+def _iter_log_blobs(process):
+    seen = set()
+    commit = None
+    meta = None
+    try:
+        for raw_field in _iter_fields(process.stdout):
+            if meta is not None:
+                # The field after a raw diff line is its path.
+                fields, meta = meta, None
+                new_mode, new_sha = fields[1], fields[3]
+                if new_sha == NULL_SHA or new_mode not in SCANNED_MODES:
+                    continue
+                binsha = bytes.fromhex(new_sha)
+                if binsha in seen:
+                    continue
+                seen.add(binsha)
+                yield commit, raw_field.decode('utf-8', errors='replace'), binsha
+                continue
+            field = raw_field.decode('utf-8', errors='replace').lstrip('\n')
+            if field.startswith('commit '):
+                commit = field[7:].split(' ', 1)[0]
+            elif field.startswith(':'):
+                meta = field.split()
+    finally:
+        process.stdout.close()
+        process.wait()
+
+def _drain(stream):
+    while stream.read(1024 * 1024):
+        pass
+
+def scan_blob(repo, binsha, path, engine=ENGINE, max_file_size=MAX_FILE_SIZE):
+    """
+    Return the Findings in one blob, read through GitPython's persistent cat-file process.
+
+    Blobs over max_file_size are skipped using ``cat-file --batch-check``
+    without fetching their content. The content is streamed into the
+    scanner, so the time recorded for ``cat-file --batch`` includes scanning it.
+    """
+    if max_file_size is not None:
+        with METRICS.git_call(('cat-file', '--batch-check')):
+            size = repo.odb.info(binsha).size
+        if size > max_file_size:
+            return []
+    with METRICS.git_call(('cat-file', '--batch', path)):
+        stream = repo.odb.stream(binsha)
+        header = stream.read(HEADER_SIZE)
+        if is_binary(header):
+            # The batch process must be read to the end before the next request.
+            _drain(stream)
+            return []
+        return list(scan_stream(stream, path, engine, prefix=header))
+
+def _scan_blobs(repo, blobs, engine, max_file_size):
+    for commit, path, binsha in blobs:
+        for finding in scan_blob(repo, binsha, path, engine, max_file_size):
+            yield HistoryFinding(commit, path, finding.rule, finding.line, finding.column)
+
+# The Repo of a pool worker process, opened once by its initializer.
+_worker_repo = None
+
+def _open_worker_repo(repo_path):
+    global _worker_repo
+    _worker_repo = Repo(repo_path)
+
+def scan_history_batch(blobs, engine=ENGINE, max_file_size=MAX_FILE_SIZE):
+    """Scan a batch of (commit, path, binsha) in a pool worker; the unit of work for the pool."""
+    return list(_scan_blobs(_worker_repo, blobs, engine, max_file_size))
+
+def iter_history_findings(repo_path, workers=1, engine=ENGINE, max_file_size=MAX_FILE_SIZE, session=None,
+                          batch_size=BATCH_SIZE):
+    """
+    Yields HistoryFindings for every blob ever committed, including deleted files.
+
+    History is enumerated once, by a single ``git log`` in this process.
+    With workers > 1, the blobs are handed out in disjoint batches to a
+    process pool whose workers each read them through their own cat-file
+    process; each batch's findings are yielded as soon as it is done, and
+    the batches in flight are bounded. A single worker scans inline,
+    reusing the Repo of session if given.
+    """
+    repo = session.repo if session is not None else Repo(repo_path)
+    try:
+        blobs = iter_history_blobs(repo)
+        if workers <= 1:
+            yield from _scan_blobs(repo, blobs, engine, max_file_size)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_repo,
+                                 initargs=(repo.working_tree_dir or repo.git_dir,)) as executor:
+            yield from iter_batched(executor, scan_history_batch, blobs, batch_size, workers * 2,
+                                    engine, max_file_size)
+    finally:
+        if session is None:
+            repo.close()
@@ -0,0 +1,134 @@
+# GitAssistant/ignore_rules.py
+
+import re
+from collections import namedtuple
+
+IgnoreRule = namedtuple('IgnoreRule', ['pattern', 'regex', 'negate', 'dir_only'])
+
+def _glob_to_regex(glob):
+    """Translate a gitignore glob (without leading '/' or trailing '/') to a regex body."""
+    parts = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('/**', i) and i + 3 == n:
+            parts.append('/.*')
+            i += 3
+        elif glob.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif c == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif c == '?':
+            parts.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = glob.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+                i += 1
+            else:
+                body = glob[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('[', '\\[') + ']')
+                i = end + 1
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return ''.join(parts)
+
+def parse_rule(line):
+    """
+    Parses one .gitignore line.
+
+    :param line: Raw line from a .gitignore file
+    :return: IgnoreRule, or None for blank lines and comments
+    """
+    line = line.rstrip('\n\r')
+    # Trailing spaces are ignored unless escaped with a backslash.
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    glob = line.rstrip('/')
+    if not glob:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore directory.
+    if '/' in glob:
+        body = _glob_to_regex(glob.lstrip('/'))
+    else:
+        body = '(?:.*/)?' + _glob_to_regex(glob)
+    return IgnoreRule(line, re.compile(f'^{body}$'), negate, dir_only)
+
+def parse_gitignore(lines):
+    """Return the IgnoreRules for an iterable of .gitignore lines, in file order."""
+    rules = []
+    for line in lines:
+        rule = parse_rule(line)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+def load_gitignore(path):
+    """Return the IgnoreRules of the .gitignore at path, or an empty list."""
+    try:
+        with open(path, 'r', errors='ignore') as gitignore_file:
+            return parse_gitignore(gitignore_file)
+    except OSError:
+        return []
+
+def match_rules(rules, relative_path, is_dir=False):
+    """
+    Applies rules to a path relative to the directory holding the .gitignore.
+
+    :return: True if ignored, False if re-included by a negation, None if no rule matched
+    """
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.regex.match(relative_path):
+            return not rule.negate
+    return None
+
+def is_ignored(levels, relative_path, is_dir=False):
+    """
+    Decides whether a path is ignored given nested .gitignore files.
+
+    :param levels: List of (base, rules) from the repository root down, where
+                   base is the directory of the .gitignore relative to the root
+                   ('' for the root)
+    :param relative_path: Path relative to the repository root, '/' separated
+    """
+    for base, rules in reversed(levels):
+        if not rules:
+            continue
+        if base:
+            if not relative_path.startswith(base + '/'):
+                continue
+            local = relative_path[len(base) + 1:]
+        else:
+            local = relative_path
+        result = match_rules(rules, local, is_dir)
+        if result is not None:
+            return result
+    return False
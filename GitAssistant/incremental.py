@@ -0,0 +1,192 @@
+# GitAssistant/incremental.py
+
+import hashlib
+import json
+import os
+import sqlite3
+from git import Repo
+from detectors import engine_signature
+from metrics import METRICS
+from scanner import ENGINE, MAX_FILE_SIZE, Finding, iter_file_results, walk_files
+
+DEFAULT_MAX_ENTRIES = 500000   # Cached blobs kept before LRU eviction
+LOOKUP_BATCH = 500             # Blob SHAs per cache query
+
+def ruleset_version(engine=ENGINE, max_file_size=MAX_FILE_SIZE):
+    """
+    Identifies everything that affects a blob's scan result.
+
+    The detector signatures cover their rules (including SENSITIVE_PATTERNS
+    and utils.SENSITIVE_DATA_PATTERNS), thresholds and allowlists, so editing
+    any of them changes the version and makes every older cache entry miss.
+    """
+    key = f'{engine_signature(engine)}\0{max_file_size}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def hash_blob(path, size):
+    """Return the git blob SHA-1 of a file, streamed so large files stay out of memory."""
+    digest = hashlib.sha1(f'blob {size}\0'.encode('ascii'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ScanCache:
+    """Persistent per-blob scan results, keyed by blob SHA and ruleset version."""
+
+    def __init__(self, path, version, max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.version = version
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(path)
+        try:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'sha TEXT PRIMARY KEY, version TEXT NOT NULL, findings TEXT NOT NULL, used INTEGER NOT NULL)'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+            # Results from another ruleset can never be hit again.
+            self.db.execute('DELETE FROM results WHERE version != ?', (version,))
+            self.clock = self.db.execute('SELECT COALESCE(MAX(used), 0) FROM results').fetchone()[0]
+        except sqlite3.Error:
+            self.db.close()
+            raise
+
+    def get_many(self, shas):
+        """Return {sha: [(rule, line, column), ...]} for the cached SHAs, marking them used."""
+        hits = {}
+        shas = list(shas)
+        for i in range(0, len(shas), LOOKUP_BATCH):
+            batch = shas[i:i + LOOKUP_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.db.execute(
+                f'SELECT sha, findings FROM results WHERE version = ? AND sha IN ({placeholders})',
+                [self.version] + batch,
+            )
+            for sha, findings in rows:
+                hits[sha] = [tuple(item) for item in json.loads(findings)]
+        if hits:
+            self.clock += 1
+            self.db.executemany('UPDATE results SET used = ? WHERE sha = ?',
+                                [(self.clock, sha) for sha in hits])
+        return hits
+
+    def put(self, sha, findings):
+        self.clock += 1
+        self.db.execute(
+            'INSERT OR REPLACE INTO results (sha, version, findings, used) VALUES (?, ?, ?, ?)',
+            (sha, self.version, json.dumps(findings), self.clock),
+        )
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries."""
+        count = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        if count > self.max_entries:
+            self.db.execute(
+                'DELETE FROM results WHERE sha IN (SELECT sha FROM results ORDER BY used LIMIT ?)',
+                (count - self.max_entries,),
+            )
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
+
+def default_cache_path(repo):
+    return os.path.join(repo.git_dir, 'gitassistant', 'scan-cache.sqlite3')
+
+def _index_stat(repo):
+    """Return {path: (hexsha, mtime_ns, size)} for the stage-0 entries of the git index."""
+    entries = {}
+    for (path, stage), entry in repo.index.entries.items():
+        if stage == 0:
+            seconds, nanoseconds = entry.mtime
+            entries[path] = (entry.hexsha, seconds * 1000000000 + nanoseconds, entry.size)
+    return entries
+
+def _blob_sha(full_path, st, indexed, index_mtime_ns):
+    """
+    Return the blob SHA of a working tree file.
+
+    The SHA recorded in the index is trusted when the file's size and mtime
+    still match it and the file is not racily clean (modified within the same
+    timestamp the index was written), as git does; otherwise the file is hashed.
+    """
+    if indexed is not None:
+        hexsha, mtime_ns, size = indexed
+        file_mtime_ns = st.st_mtime_ns
+        if mtime_ns % 1000000000 == 0:
+            file_mtime_ns -= file_mtime_ns % 1000000000
+        if size == st.st_size and mtime_ns == file_mtime_ns and mtime_ns < index_mtime_ns:
+            return hexsha
+    METRICS.count('files_hashed')
+    return hash_blob(full_path, st.st_size)
+
+def _iter_repo_findings(repo, cache_path, engine, workers, use_processes, max_file_size, max_entries):
+    root = repo.working_tree_dir
+    cache = ScanCache(cache_path or default_cache_path(repo), ruleset_version(engine, max_file_size), max_entries)
+    try:
+        indexed = _index_stat(repo)
+        try:
+            index_mtime_ns = os.stat(repo.index.path).st_mtime_ns
+        except OSError:
+            index_mtime_ns = 0
+
+        paths_by_sha = {}
+        for full_path in METRICS.timed_iter('scan.walk', walk_files(root)):
+            try:
+                st = os.stat(full_path)
+                if max_file_size is not None and st.st_size > max_file_size:
+                    continue
+                relative_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+                sha = _blob_sha(full_path, st, indexed.get(relative_path), index_mtime_ns)
+            except OSError:
+                continue
+            paths_by_sha.setdefault(sha, []).append(full_path)
+
+        with METRICS.phase('scan.cache_lookup'):
+            hits = cache.get_many(paths_by_sha)
+        METRICS.count('cache_hits', len(hits))
+        METRICS.count('cache_misses', len(paths_by_sha) - len(hits))
+        for sha, results in hits.items():
+            for full_path in paths_by_sha[sha]:
+                for rule, line, column in results:
+                    yield Finding(full_path, rule, line, column)
+
+        sha_by_path = {paths[0]: sha for sha, paths in paths_by_sha.items() if sha not in hits}
+        for scanned_path, findings in iter_file_results(iter(sha_by_path), engine, workers,
+                                                        use_processes, max_file_size):
+            if findings is None:
+                # Unreadable now, perhaps only transiently; caching it as
+                # clean would hide its findings until the content changes.
+                continue
+            sha = sha_by_path[scanned_path]
+            results = [(f.rule, f.line, f.column) for f in findings]
+            cache.put(sha, results)
+            for full_path in paths_by_sha[sha]:
+                for rule, line, column in results:
+                    yield Finding(full_path, rule, line, column)
+    finally:
+        cache.close()
+
+def iter_incremental_findings(repo_path, cache_path=None, engine=ENGINE, workers=None,
+                              use_processes=False, max_file_size=MAX_FILE_SIZE,
+                              max_entries=DEFAULT_MAX_ENTRIES, session=None):
+    """
+    Yields Findings for the working tree, scanning only blobs not already cached.
+
+    Files are identified by blob SHA, taken from the git index when its stat
+    data is still valid, so unchanged files cost one stat and one cache hit.
+    Identical content at several paths is scanned once. Pass a
+    session.GitSession to reuse its Repo handle; otherwise one is opened
+    and closed here.
+    """
+    args = (cache_path, engine, workers, use_processes, max_file_size, max_entries)
+    if session is not None:
+        yield from _iter_repo_findings(session.repo, *args)
+        return
+    repo = Repo(repo_path)
+    try:
+        yield from _iter_repo_findings(repo, *args)
+    finally:
+        repo.close()
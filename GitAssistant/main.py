@@ -1,7 +1,9 @@
 import os
-from scanner import scan_repository
+from history import iter_history_findings
+from incremental import iter_incremental_findings
 from git_ignore_manager import update_gitignore
 from merge_helper import merge_branches, current_active_branch
+from session import GitSession
 
 def main():
     repo_path = input("Enter the path to your local Git repository: ").strip()
@@ -9,33 +11,38 @@ def main():
         print("The specified path does not exist or is not a directory.")
         return
 
-    sensitive_files, sensitive_data = scan_repository(repo_path)
-
-    if sensitive_files:
-        print("Sensitive files detected:")
-        for file in set(sensitive_files):
-            print(f" - {file}")
-    else:
-        print("No sensitive files detected.")
-
-    head = current_active_branch(repo_path)
-    print(f"Current active branch: {head}")
-
-    if sensitive_data:
-        print("Files containing sensitive data detected:")
-        for file in set(sensitive_data):
-            print(f" - {file}")
-    else:
-        print("No sensitive data detected in files.")
-
-    update_gitignore(repo_path)
-
-    merge_option = input("\nDo you want to merge a branch into the current branch? (y/n): ").lower()
-    if merge_option == 'y':
-        branch_to_merge = input("Enter the name of the branch to merge: ").strip()
-        merge_branches(repo_path, branch_to_merge)
-    else:
-        print("Merge operation skipped.")
+    with GitSession(repo_path) as session:
+        head = current_active_branch(session)
+        print(f"Current active branch: {head or '(detached HEAD)'}")
+
+        print("Scanning for sensitive data...")
+        sensitive_data = set()
+        for finding in iter_incremental_findings(repo_path, session=session):
+            sensitive_data.add(finding.path)
+            print(f" - {finding.path}:{finding.line}:{finding.column} [{finding.rule}]")
+
+        if sensitive_data:
+            print(f"Sensitive data detected in {len(sensitive_data)} file(s).")
+        else:
+            print("No sensitive data detected in files.")
+
+        history_option = input("\nDo you want to scan the commit history as well? (y/n): ").lower()
+        if history_option == 'y':
+            found = False
+            for finding in iter_history_findings(repo_path, session=session):
+                found = True
+                print(f" - {finding.commit[:12]} {finding.path}:{finding.line}:{finding.column} [{finding.rule}]")
+            if not found:
+                print("No sensitive data detected in history.")
+
+        update_gitignore(repo_path)
+
+        merge_option = input("\nDo you want to merge a branch into the current branch? (y/n): ").lower()
+        if merge_option == 'y':
+            branch_to_merge = input("Enter the name of the branch to merge: ").strip()
+            merge_branches(session, branch_to_merge)
+        else:
+            print("Merge operation skipped.")
 
 if __name__ == "__main__":
     main()
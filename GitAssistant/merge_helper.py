@@ -1,139 +1,184 @@
-import os
-from git import Repo, GitCommandError, InvalidGitRepositoryError
-
-def current_active_branch(repo_path):
-    """Return the current active branch."""
-    repo = Repo(repo_path)
-    return repo.active_branch.name
-
-def merge_branches(repo_path, branch_to_merge):
-    """Merge a specified branch into the current branch."""
+from contextlib import contextmanager
+from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from conflict_resolver import STRATEGIES, resolve_file, resolve_unmerged, strategy_for
+from metrics import METRICS
+from session import GitSession
+
+# What merge_branches did.
+MERGED = 'merged'           # The merge is committed (or was a fast-forward)
+NOT_MERGED = 'not merged'   # Refused, or left with conflicts and aborted
+MERGE_ERROR = 'error'       # Not a repository, no such branch, or git failed
+
+@contextmanager
+def open_session(repo):
+    """
+    Yield a GitSession for repo, a repository path or a GitSession.
+
+    A session passed in is yielded as is and left open for its owner; one
+    opened here is closed on exit, stopping its git processes.
+    """
+    if isinstance(repo, GitSession):
+        yield repo
+    else:
+        with GitSession(repo) as session:
+            yield session
+
+def current_active_branch(repo):
+    """Return the current active branch of a repository path or GitSession, or None when detached."""
+    with open_session(repo) as session:
+        return session.active_branch()
+
+def merge_branches(repo, branch_to_merge, interactive=True, strategies=None):
+    """
+    Merge a specified branch into the current branch.
+
+    repo is a repository path or a GitSession. The merge is previewed first
+    without touching the worktree; when interactive is False and some
+    conflicting path has no strategy, it is not attempted at all. Conflicts
+    are resolved with strategies (see conflict_resolver.strategy_for) where
+    they match.
+
+    :return: MERGED, NOT_MERGED or MERGE_ERROR
+    """
     try:
-        repo = Repo(repo_path)
-    except (InvalidGitRepositoryError, GitCommandError):
-        print(f"Error: {repo_path} is not a valid Git repository.")
-        return
+        with open_session(repo) as session:
+            return _merge_branches(session, branch_to_merge, interactive, strategies)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        print(f"Error: {repo} is not a valid Git repository.")
+        return MERGE_ERROR
+
+def _merge_branches(session, branch_to_merge, interactive, strategies):
+    repo = session.repo
 
-    if branch_to_merge not in [b.name for b in repo.branches]:
+    if not session.has_branch(branch_to_merge):
         print(f"Branch '{branch_to_merge}' does not exist in this repository.")
-        return
+        return MERGE_ERROR
+
+    current_branch = session.active_branch()
+    if current_branch is None:
+        print("HEAD is detached; check out the branch to merge into first.")
+        return MERGE_ERROR
+    if not session.has_branch(current_branch):
+        print(f"Branch '{current_branch}' has no commits yet; there is nothing to merge into.")
+        return MERGE_ERROR
+    with METRICS.phase('merge.preview'):
+        ahead, behind = session.ahead_behind(branch_to_merge)
+        preview = session.preview_merge(branch_to_merge)
+    print(f"'{branch_to_merge}' is {ahead} commit(s) ahead of and {behind} behind '{current_branch}'.")
+    if preview is not None and not preview.clean:
+        print("The merge will conflict in:")
+        for path in preview.conflicts:
+            print(f" - {path}")
+        unhandled = [path for path in preview.conflicts if strategy_for(path, strategies) is None]
+        if not interactive and unhandled:
+            print("Merge not attempted; no strategy covers every conflicting path.")
+            return NOT_MERGED
 
-    current_branch = repo.active_branch.name
     print(f"Attempting to merge '{branch_to_merge}' into '{current_branch}'...\n")
-    
+
     try:
-        repo.git.merge(branch_to_merge)
+        with METRICS.phase('merge.merge'), METRICS.git_call(('merge', branch_to_merge)):
+            repo.git.merge(branch_to_merge)
         print(f"Branch '{branch_to_merge}' merged successfully into '{current_branch}'.")
+        return MERGED
     except GitCommandError as e:
-        if 'CONFLICT' in str(e):
-            print(f"Merge conflict detected.")
-            handle_merge_conflicts(repo)
-        else:
+        if 'CONFLICT' not in str(e):
             print(f"An error occurred during merge: {e}")
-
-def handle_merge_conflicts(repo):
-    """Handle merge conflicts block by block."""
+            return MERGE_ERROR
+        print(f"Merge conflict detected.")
+        with METRICS.phase('merge.resolve'):
+            resolved = handle_merge_conflicts(repo, strategies, interactive)
+        if resolved:
+            return MERGED
+        if not interactive:
+            with METRICS.git_call(('merge', '--abort')):
+                repo.git.merge('--abort')
+            print("Merge aborted; resolve the conflicts interactively or merge manually.")
+        return NOT_MERGED
+
+def handle_merge_conflicts(repo, strategies=None, interactive=True):
+    """
+    Resolve merge conflicts, applying per-path strategies first.
+
+    Hunks no strategy resolves are prompted for block by block when
+    interactive; otherwise the merge is left for the caller to abort.
+    """
     print("\nConflicts detected in the following files:")
-    conflicts = repo.index.unmerged_blobs()
-    resolved_files = []
-
-    for file_path in conflicts.keys():
+    for file_path in repo.index.unmerged_blobs():
         print(f" - {file_path}")
-        full_file_path = os.path.join(repo.working_tree_dir, file_path)
 
-        if os.path.isfile(full_file_path):
-            resolved = extract_and_resolve_conflicts_block_by_block(full_file_path)
-            if resolved:
-                resolved_files.append(file_path)
-            else:
-                print(f"Could not resolve conflicts in '{file_path}'.")
+    resolutions = resolve_unmerged(repo, strategies, prompt_for_hunk if interactive else None)
+    resolved_files = [r.path for r in resolutions if r.resolved]
+    METRICS.count('merge_files_conflicted', len(resolutions))
+    METRICS.count('merge_files_resolved', len(resolved_files))
+    for resolution in resolutions:
+        if not resolution.resolved:
+            print(f"Could not resolve conflicts in '{resolution.path}'.")
+
+    if not interactive and len(resolved_files) < len(resolutions):
+        return False
 
     if resolved_files:
-        repo.git.add(resolved_files)
+        with METRICS.git_call(['add'] + resolved_files):
+            repo.git.add(resolved_files)
         try:
-            repo.index.commit("Merge resolved by GitAssistant")
+            # git commit finishes the merge: MERGE_HEAD becomes the second
+            # parent and the merge state is cleared.
+            with METRICS.git_call(('commit', '--no-edit')):
+                repo.git.commit('--no-edit')
             print("\nMerge conflicts resolved and committed.")
+            return True
         except Exception as e:
             print(f"An error occurred while committing the merge: {e}")
     else:
         print("No conflicts were resolved.")
+    return False
+
+def prompt_for_hunk(hunk):
+    """Show a conflict block to the user and return the lines they choose to keep."""
+    print("\nConflict detected in:")
+    print(">>> Your changes (ours):")
+    for idx, line in enumerate(hunk.ours, start=1):
+        print(f"{idx}: {line.strip()}")
+
+    if hunk.base is not None:
+        print(">>> Common ancestor (base):")
+        for idx, line in enumerate(hunk.base, start=1):
+            print(f"{idx}: {line.strip()}")
+
+    print(">>> Incoming changes (theirs):")
+    for idx, line in enumerate(hunk.theirs, start=1):
+        print(f"{idx}: {line.strip()}")
+
+    # Ask user what they want to keep
+    while True:
+        choice = input("Choose (o)urs, (t)heirs, (b)oth, or (e)dit manually: ").lower()
+        if choice == 'o':
+            return hunk.ours
+        elif choice == 't':
+            return hunk.theirs
+        elif choice == 'b':
+            return hunk.ours + hunk.theirs
+        elif choice == 'e':
+            print("Enter custom changes. Type a single '.' on a new line to finish.")
+            custom_block = []
+            while True:
+                user_input = input()
+                if user_input == '.':
+                    break
+                custom_block.append(user_input + '\n')
+            return custom_block
+        else:
+            print("Invalid choice. Please enter 'o', 't', 'b', or 'e'.")
 
-def extract_and_resolve_conflicts_block_by_block(file_path):
-    conflict_start = '<<<<<<<'
-    conflict_mid = '======='
-    conflict_end = '>>>>>>>'
-
+def extract_and_resolve_conflicts_block_by_block(file_path, strategy=None):
+    """Resolve one file, prompting for every hunk the strategy does not handle."""
     try:
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
-
-        new_lines = []
-        conflicts_found = False
-        i = 0
-
-        while i < len(lines):
-            line = lines[i]
-            if line.startswith(conflict_start):
-                conflicts_found = True
-
-                conflict_block = {'ours': [], 'theirs': []}
-                i += 1
-                while i < len(lines) and not lines[i].startswith(conflict_mid):
-                    conflict_block['ours'].append(lines[i])
-                    i += 1
-
-                i += 1
-                while i < len(lines) and not lines[i].startswith(conflict_end):
-                    conflict_block['theirs'].append(lines[i])
-                    i += 1
-
-                i += 1  
-
-                # Show conflict block to the user
-                print("\nConflict detected in:")
-                print(">>> Your changes (ours):")
-                for idx, line in enumerate(conflict_block['ours'], start=1):
-                    print(f"{idx}: {line.strip()}")
-
-                print(">>> Incoming changes (theirs):")
-                for idx, line in enumerate(conflict_block['theirs'], start=1):
-                    print(f"{idx}: {line.strip()}")
-
-                # Ask user what they want to keep
-                while True:
-                    choice = input("Choose (o)urs, (t)heirs, (b)oth, or (e)dit manually: ").lower()
-                    if choice == 'o':
-                        new_lines.extend(conflict_block['ours'])
-                        break
-                    elif choice == 't':
-                        new_lines.extend(conflict_block['theirs'])
-                        break
-                    elif choice == 'b':
-                        new_lines.extend(conflict_block['ours'] + conflict_block['theirs'])
-                        break
-                    elif choice == 'e':
-                        print("Enter custom changes. Type a single '.' on a new line to finish.")
-                        custom_block = []
-                        while True:
-                            user_input = input()
-                            if user_input == '.':
-                                break
-                            custom_block.append(user_input + '\n')
-                        new_lines.extend(custom_block)
-                        break
-                    else:
-                        print("Invalid choice. Please enter 'o', 't', 'b', or 'e'.")
-            else:
-                new_lines.append(line)
-                i += 1
-
-        if conflicts_found:
-            with open(file_path, 'w') as file:
-                file.writelines(new_lines)
-            return True
-        else:
+        resolver = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+        resolution = resolve_file(file_path, resolver, prompt_for_hunk)
+        if not resolution.hunks:
             print(f"No conflict markers found in '{file_path}'.")
-            return False
+        return resolution.resolved
     except Exception as e:
         print(f"Error processing conflicts in '{file_path}': {e}")
         return False
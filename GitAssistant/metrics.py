@@ -0,0 +1,186 @@
+# GitAssistant/metrics.py
+
+import heapq
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SLOWEST = 10        # Files, detectors and git calls listed in a report
+MAX_COMMAND = 200   # Characters of a git command line kept in a report
+
+class Metrics:
+    """
+    Process-wide timers and counters, recorded only while enabled.
+
+    Instrumented code checks ``METRICS.enabled`` (or calls a method that
+    does) before doing any work, so a disabled collector costs one attribute
+    lookup on hot paths. Recording is thread safe; work done in process pool
+    workers is not collected.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.phases = {}            # name -> [calls, seconds, items]
+        self.counters = Counter()
+        self.rule_matches = Counter()
+        self.detector_seconds = Counter()
+        self.detector_rules = {}
+        self.git_commands = {}      # subcommand -> [calls, seconds, failures]
+        self.slowest_git = []       # min-heaps of (seconds, ...)
+        self.slowest_files = []
+        self.files_seconds = 0.0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _add_phase(self, name, seconds, items=0):
+        with self._lock:
+            phase = self.phases.setdefault(name, [0, 0.0, 0])
+            phase[0] += 1
+            phase[1] += seconds
+            phase[2] += items
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block under name, e.g. ``with METRICS.phase('merge.preview'):``."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, time.perf_counter() - start)
+
+    def timed_iter(self, name, iterable):
+        """
+        Return iterable, counting its items and the time spent producing them under name.
+
+        Only time inside the iterator is counted, so a lazy walk consumed by a
+        scan loop is measured without the scan.
+        """
+        if not self.enabled:
+            return iterable
+        return self._timed(iter(iterable), lambda seconds, items: self._add_phase(name, seconds, items))
+
+    def _timed(self, iterator, finish):
+        """Yield from iterator, then call finish(seconds, items) with the time spent inside it."""
+        seconds = 0.0
+        items = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    seconds += time.perf_counter() - start
+                    return
+                seconds += time.perf_counter() - start
+                items += 1
+                yield item
+        finally:
+            finish(seconds, items)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def record_file(self, path, seconds, size):
+        """Record the time taken to scan one file, keeping the slowest SLOWEST."""
+        with self._lock:
+            self.counters['files_scanned'] += 1
+            self.files_seconds += seconds
+            entry = (seconds, path, size)
+            if len(self.slowest_files) < SLOWEST:
+                heapq.heappush(self.slowest_files, entry)
+            elif entry > self.slowest_files[0]:
+                heapq.heapreplace(self.slowest_files, entry)
+
+    def record_match(self, rule):
+        with self._lock:
+            self.rule_matches[rule] += 1
+
+    def timed_detector(self, name, detector, matches):
+        """Wrap a detector's finditer generator, adding the time spent in it to name."""
+        self.detector_rules[name] = detector.rule_names
+        return self._timed(matches, lambda seconds, _: self._add_detector(name, seconds))
+
+    def _add_detector(self, name, seconds):
+        with self._lock:
+            self.detector_seconds[name] += seconds
+
+    @contextmanager
+    def git_call(self, args):
+        """
+        Time one git subprocess, e.g. ``with METRICS.git_call(('merge', branch)):``.
+
+        A streamed process is timed from start to end of its output, including
+        the time its consumer spends between reads.
+
+        :param args: The git arguments, without the leading 'git'
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        except GeneratorExit:
+            # A generator streaming the output was closed early.
+            failed = False
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            command = ' '.join(str(arg) for arg in args)[:MAX_COMMAND]
+            with self._lock:
+                totals = self.git_commands.setdefault(str(args[0]) if args else '', [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += seconds
+                totals[2] += failed
+                entry = (seconds, command)
+                if len(self.slowest_git) < SLOWEST:
+                    heapq.heappush(self.slowest_git, entry)
+                elif entry > self.slowest_git[0]:
+                    heapq.heapreplace(self.slowest_git, entry)
+
+    def report(self):
+        """Return everything recorded as a JSON-serialisable dict, slowest first."""
+        with self._lock:
+            phases = {name: {'calls': calls, 'seconds': round(seconds, 6), 'items': items}
+                      for name, (calls, seconds, items) in sorted(self.phases.items())}
+            detectors = [{'detector': name, 'seconds': round(seconds, 6), 'rules': self.detector_rules.get(name, [])}
+                         for name, seconds in self.detector_seconds.most_common()]
+            commands = {name: {'calls': calls, 'seconds': round(seconds, 6), 'failures': failures}
+                        for name, (calls, seconds, failures) in sorted(self.git_commands.items())}
+            return {
+                'phases': phases,
+                'counters': dict(sorted(self.counters.items())),
+                'files': {
+                    'scanned': self.counters['files_scanned'],
+                    'seconds': round(self.files_seconds, 6),
+                    'slowest': [{'path': path, 'seconds': round(seconds, 6), 'bytes': size}
+                                for seconds, path, size in sorted(self.slowest_files, reverse=True)],
+                },
+                'rules': dict(self.rule_matches.most_common()),
+                'detectors': detectors,
+                'git': {
+                    'calls': sum(totals[0] for totals in self.git_commands.values()),
+                    'seconds': round(sum(totals[1] for totals in self.git_commands.values()), 6),
+                    'commands': commands,
+                    'slowest': [{'command': command, 'seconds': round(seconds, 6)}
+                                for seconds, command in sorted(self.slowest_git, reverse=True)],
+                },
+            }
+
+METRICS = Metrics()
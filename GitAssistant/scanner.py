@@ -1,25 +1,321 @@
+import codecs
+import heapq
 import os
 import re
+import time
+from collections import namedtuple
+from operator import itemgetter
+from detectors import RegexDetector, build_engine, register_detector
+from ignore_rules import is_ignored, load_gitignore
+from metrics import METRICS
+from utils import SENSITIVE_DATA_RULES
 
-SENSITIVE_PATTERNS = [
-    r'API[_-]?KEY\s*=\s*[\'"][A-Za-z0-9_\-]+[\'"]',
-    r'PASSWORD\s*=\s*[\'"][^\'"]+[\'"]',
-    r'TOKEN\s*=\s*[\'"][A-Za-z0-9_\-]+[\'"]'
-]
+SENSITIVE_RULES = {
+    'api_key': r'API[_-]?KEY\s*=\s*[\'"][A-Za-z0-9_\-]+[\'"]',
+    'password': r'PASSWORD\s*=\s*[\'"][^\'"]+[\'"]',
+    'token': r'TOKEN\s*=\s*[\'"][A-Za-z0-9_\-]+[\'"]',
+}
+
+SENSITIVE_PATTERNS = list(SENSITIVE_RULES.values())
+
+# Directories never worth descending into, whatever .gitignore says.
+SKIP_DIRS = frozenset(['.git', '.hg', '.svn', 'node_modules', 'venv', '.venv', '__pycache__'])
+
+HEADER_SIZE = 8192                  # Bytes sniffed for the binary check
+CHUNK_SIZE = 1024 * 1024            # Bytes read per chunk
+OVERLAP = 64 * 1024                 # Characters carried across a split line
+MAX_FILE_SIZE = 100 * 1024 * 1024   # Larger files are skipped; None disables
+BATCH_SIZE = 32                     # Files per pool work item
+
+# Lowercase literals that must appear on the line where a match of the rule starts.
+# Rules without an entry here force a full regex pass over every file.
+RULE_ANCHORS = {
+    'api_key': ('api',),
+    'password': ('password',),
+    'token': ('token',),
+    'api_key_value': ('api_key',),
+    'password_value': ('password',),
+    'aws_secret_access_key': ('aws_secret_access_key',),
+    'private_key': ('begin private key',),
+    'rsa_private_key': ('begin rsa private key',),
+    'ec_private_key': ('begin ec private key',),
+    'email': ('@',),
+}
+
+# Matches of a rule containing any of these patterns are not reported.
+RULE_ALLOWLIST = {
+    'email': [r'@(?:[\w.-]+\.)?example\.(?:com|org|net)$', r'noreply', r'^git@', r'@localhost$'],
+    'high_entropy': [r'^sha(?:1|256|384|512)[-=]'],   # Lockfile integrity and wheel RECORD hashes
+}
+
+DEFAULT_DETECTORS = ('patterns', 'providers', 'entropy')
+
+Finding = namedtuple('Finding', ['path', 'rule', 'line', 'column'])
+
+def build_rules():
+    """Return (name, pattern, flags) for every scanner and utils rule."""
+    rules = [(name, pattern, re.IGNORECASE) for name, pattern in SENSITIVE_RULES.items()]
+    rules += [(name, pattern, 0) for name, pattern in SENSITIVE_DATA_RULES.items()]
+    return rules
+
+@register_detector('patterns')
+def pattern_detector(allowlist=None):
+    """SENSITIVE_PATTERNS and utils.SENSITIVE_DATA_PATTERNS as one RegexDetector."""
+    return RegexDetector(build_rules(), RULE_ANCHORS, allowlist)
+
+ENGINE = build_engine(DEFAULT_DETECTORS, RULE_ALLOWLIST)
+
+def _profiled_matches(text, engine, pos):
+    """_iter_matches, timing each detector and counting the matches reported per rule."""
+    names = engine.names or [type(detector).__name__ for detector in engine.detectors]
+    timed = [METRICS.timed_detector(name, detector, detector.finditer(text, pos))
+             for name, detector in zip(names, engine.detectors)]
+    last_end = -1
+    for rule, start, end in heapq.merge(*timed, key=itemgetter(1)):
+        if start < last_end:
+            continue
+        last_end = end
+        METRICS.record_match(rule)
+        yield rule, start, end
+
+def _iter_matches(text, engine, pos=0):
+    """Yield (rule, start, end) from every detector in start order, dropping overlapping matches."""
+    if METRICS.enabled:
+        yield from _profiled_matches(text, engine, pos)
+        return
+    detectors = engine.detectors
+    if len(detectors) == 1:
+        yield from detectors[0].finditer(text, pos)
+        return
+    last_end = -1
+    for rule, start, end in heapq.merge(*(d.finditer(text, pos) for d in detectors), key=itemgetter(1)):
+        if start < last_end:
+            continue
+        last_end = end
+        yield rule, start, end
+
+def _scan_buffer(text, path, engine, line=1, column=1, pos=0, stop=None):
+    """
+    Yields (Finding, match end) for matches starting in text[pos:stop].
+
+    :param line: Line number of text[0]
+    :param column: Column of text[0] within its line
+    """
+    line_start = 1 - column
+    cursor = 0
+    for rule, start, end in _iter_matches(text, engine, pos):
+        if stop is not None and start >= stop:
+            break
+        newlines = text.count('\n', cursor, start)
+        if newlines:
+            line += newlines
+            line_start = text.rindex('\n', cursor, start) + 1
+        cursor = start
+        yield Finding(path, rule, line, start - line_start + 1), end
+
+def scan_text(text, path, engine=ENGINE):
+    """Yield a Finding for every rule match in text, with 1-based line and column."""
+    for finding, _ in _scan_buffer(text, path, engine):
+        yield finding
+
+def is_binary(header):
+    """Treat data with a NUL byte in its first block as binary, as git does."""
+    return b'\0' in header
+
+def scan_stream(stream, path, engine=ENGINE, prefix=b'', chunk_size=CHUNK_SIZE, overlap=OVERLAP):
+    """
+    Scans a binary stream in fixed-size chunks so memory stays flat for any size.
+
+    Each chunk is scanned up to the start of its last non-blank complete
+    line; that line and the rest are carried into the next chunk, so a match
+    running on into the following non-blank line is still found. A line longer
+    than ``overlap`` is split, and its last ``overlap`` characters are
+    carried instead so a match that straddles the split is still found.
+
+    :param stream: Object with a ``read(size)`` method returning bytes
+    :param prefix: Bytes already consumed from the stream (e.g. a sniffed header)
+    :return: Generator of Findings
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    carry = ''
+    line = 1
+    column = 1
+    resume = 0
+    data = prefix
+    METRICS.count('bytes_read', len(prefix))
+    while True:
+        chunk = stream.read(chunk_size)
+        METRICS.count('bytes_read', len(chunk))
+        data = data + chunk if data else chunk
+        eof = not chunk
+        text = carry + decoder.decode(data, final=eof)
+        data = b''
+        if eof:
+            cut = len(text)
+        else:
+            last = text.rfind('\n')
+            cut = text.rfind('\n', 0, len(text[:last].rstrip())) + 1 if last != -1 else 0
+            if len(text) - cut > overlap:
+                cut = len(text) - overlap
+        for finding, end in _scan_buffer(text, path, engine, line, column, resume, cut):
+            resume = end
+            yield finding
+        if eof:
+            return
+        newlines = text.count('\n', 0, cut)
+        if newlines:
+            line += newlines
+            column = cut - text.rindex('\n', 0, cut)
+        else:
+            column += cut
+        resume = max(resume - cut, 0)
+        carry = text[cut:]
+
+def _scan_file(full_path, engine, max_file_size):
+    try:
+        with open(full_path, 'rb') as f:
+            if max_file_size is not None and os.fstat(f.fileno()).st_size > max_file_size:
+                METRICS.count('files_skipped_large')
+                return []
+            header = f.read(HEADER_SIZE)
+            if is_binary(header):
+                METRICS.count('files_skipped_binary')
+                METRICS.count('bytes_read', len(header))
+                return []
+            return list(scan_stream(f, full_path, engine, prefix=header))
+    except OSError:
+        METRICS.count('files_unreadable')
+        return None
+
+def scan_file(full_path, engine=ENGINE, max_file_size=MAX_FILE_SIZE):
+    """
+    Return every Finding in a file, skipping binaries and files over max_file_size.
+
+    :return: List of Findings, empty for a clean or skipped file, or None if
+             the file could not be read (so callers must not cache it as clean)
+    """
+    if not METRICS.enabled:
+        return _scan_file(full_path, engine, max_file_size)
+    start = time.perf_counter()
+    findings = _scan_file(full_path, engine, max_file_size)
+    try:
+        size = os.path.getsize(full_path)
+    except OSError:
+        size = None
+    METRICS.record_file(full_path, time.perf_counter() - start, size)
+    return findings
+
+def scan_files(paths, engine=ENGINE, max_file_size=MAX_FILE_SIZE):
+    """Scan a batch of files; the unit of work handed to pool workers."""
+    return [(path, scan_file(path, engine, max_file_size)) for path in paths]
+
+def walk_files(repo_path, skip_dirs=SKIP_DIRS, honor_gitignore=True):
+    """
+    Yields the path of every regular file under repo_path.
+
+    Uses os.scandir and prunes whole directories that are in skip_dirs or
+    ignored by a .gitignore, so they are never listed. Nested .gitignore files
+    apply to their own subtree. Symlinks are not followed.
+    """
+    stack = [(repo_path, '', [])]
+    while stack:
+        directory, relative_dir, levels = stack.pop()
+        if honor_gitignore:
+            rules = load_gitignore(os.path.join(directory, '.gitignore'))
+            if rules:
+                levels = levels + [(relative_dir, rules)]
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        METRICS.count('dirs_walked')
+        subdirs = []
+        for entry in entries:
+            relative_path = f'{relative_dir}/{entry.name}' if relative_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in skip_dirs or (levels and is_ignored(levels, relative_path, True)):
+                        METRICS.count('dirs_skipped')
+                        continue
+                    subdirs.append((entry.path, relative_path, levels))
+                elif entry.is_file(follow_symlinks=False):
+                    if levels and is_ignored(levels, relative_path):
+                        METRICS.count('files_ignored')
+                        continue
+                    yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+def iter_file_results(paths, engine=ENGINE, workers=None, use_processes=False,
+                      max_file_size=MAX_FILE_SIZE, batch_size=BATCH_SIZE):
+    """
+    Scans paths and yields (path, findings) for each file as soon as it is done.
+    findings is None for a file that could not be read (see scan_file).
+
+    Files are scanned in batches on a thread pool, or a process pool when
+    use_processes is set (regex matching holds the GIL, so processes are what
+    spread a CPU-bound scan over all cores). workers=1 scans inline.
+    The number of batches in flight is bounded, so a lazy paths iterable is
+    never consumed far ahead of the scan.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield path, scan_file(path, engine, max_file_size)
+        return
+
+    # Imported here so that scanning a single buffer (e.g. a staged diff)
+    # does not pay for concurrent.futures and multiprocessing at startup.
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        yield from iter_batched(executor, scan_files, paths, batch_size, workers * 2, engine, max_file_size)
+
+def iter_batched(executor, func, items, batch_size, max_pending, *args):
+    """
+    Submits items to executor in batches and yields the results of each batch as it completes.
+
+    func(batch, *args) must return a list. At most max_pending batches are
+    in flight, so a lazy items iterable is never consumed far ahead of the work.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = set()
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) < batch_size:
+            continue
+        pending.add(executor.submit(func, batch, *args))
+        batch = []
+        if len(pending) >= max_pending:
+            with METRICS.phase('scan.wait'):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    if batch:
+        pending.add(executor.submit(func, batch, *args))
+    while pending:
+        with METRICS.phase('scan.wait'):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from future.result()
+
+def iter_findings(repo_path, engine=ENGINE, workers=None, use_processes=False,
+                  max_file_size=MAX_FILE_SIZE, honor_gitignore=True, batch_size=BATCH_SIZE):
+    """Yields Findings for every file under repo_path as soon as they are found."""
+    paths = METRICS.timed_iter('scan.walk', walk_files(repo_path, honor_gitignore=honor_gitignore))
+    for _, findings in iter_file_results(paths, engine, workers, use_processes, max_file_size, batch_size):
+        yield from findings or ()
 
 def scan_repository(repo_path):
     sensitive_files = set()
     sensitive_data = set()
 
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            full_path = os.path.join(root, file)
-            with open(full_path, 'r', errors='ignore') as f:
-                content = f.read()
-                for pattern in SENSITIVE_PATTERNS:
-                    if re.search(pattern, content, re.IGNORECASE):
-                        sensitive_files.add(file)
-                        sensitive_data.add(full_path)
-                        break
+    for finding in iter_findings(repo_path):
+        sensitive_files.add(os.path.basename(finding.path))
+        sensitive_data.add(finding.path)
 
     return sensitive_files, sensitive_data
@@ -0,0 +1,159 @@
+# GitAssistant/session.py
+
+import os
+from collections import namedtuple
+from git import Repo
+from metrics import METRICS
+
+MergePreview = namedtuple('MergePreview', ['clean', 'tree', 'conflicts'])
+
+class GitSession:
+    """
+    One Repo handle shared by everything that works on a repository.
+
+    GitPython keeps a persistent ``git cat-file --batch`` process per Repo, so
+    sharing the handle also shares that process; close the session (or use
+    it as a context manager) to stop it. Refs are read straight from
+    packed-refs and the loose ref files and cached until one of them changes.
+    """
+
+    def __init__(self, repo_path):
+        self.repo = Repo(repo_path)
+        self.common_dir = self.repo.common_dir
+        self._refs = None
+        self._refs_stamp = None
+        self._ref_dirs = []
+        self._packed = None
+        self._packed_stamp = None
+
+    def close(self):
+        self.repo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _git(self, *args, **kwargs):
+        """Run a git subcommand, e.g. self._git('rev-list', '--count', 'HEAD')."""
+        with METRICS.git_call(args):
+            return self.repo.git.execute(['git'] + list(args), **kwargs)
+
+    def _packed_stamp_now(self):
+        try:
+            st = os.stat(os.path.join(self.common_dir, 'packed-refs'))
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _packed_refs(self):
+        """Map of ref name to SHA from packed-refs, reread only when the file changes."""
+        stamp = self._packed_stamp_now()
+        if self._packed is None or stamp != self._packed_stamp:
+            packed = {}
+            try:
+                with open(os.path.join(self.common_dir, 'packed-refs'), 'r') as packed_file:
+                    for line in packed_file:
+                        if line.startswith('#') or line.startswith('^'):
+                            continue
+                        sha, _, name = line.rstrip('\n').partition(' ')
+                        if name:
+                            packed[name] = sha
+            except OSError:
+                pass
+            self._packed = packed
+            self._packed_stamp = stamp
+        return self._packed
+
+    def _ref_stamp(self):
+        """
+        Return the mtimes that change whenever a ref is created, moved or deleted.
+
+        git updates refs by renaming a lock file into place, which touches the
+        containing directory, so packed-refs plus the directories seen by the
+        last load suffice: one stat per directory, and no listing of ref files.
+        A new subdirectory touches its parent, which is already stamped.
+        """
+        stamp = [self._packed_stamp_now()]
+        for directory in self._ref_dirs:
+            try:
+                stamp.append(os.stat(directory).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def _load_refs(self):
+        """Return (refs, stamp), the stamp taken after listing and before reading the ref files."""
+        listing = list(os.walk(os.path.join(self.common_dir, 'refs')))
+        self._ref_dirs = [root for root, _, _ in listing]
+        stamp = self._ref_stamp()
+        refs = dict(self._packed_refs())
+        # Loose refs take precedence over packed ones.
+        for root, _, files in listing:
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    with open(path, 'r') as loose:
+                        value = loose.read().strip()
+                except OSError:
+                    continue
+                if value.startswith('ref:'):
+                    continue
+                name = os.path.relpath(path, self.common_dir).replace(os.sep, '/')
+                refs[name] = value
+        return refs, stamp
+
+    @property
+    def refs(self):
+        """Map of full ref name (e.g. 'refs/heads/main') to commit SHA."""
+        if self._refs is None or self._ref_stamp() != self._refs_stamp:
+            self._refs, self._refs_stamp = self._load_refs()
+        return self._refs
+
+    def has_branch(self, name):
+        """Check one branch with a stat of its loose ref file, falling back to packed-refs."""
+        ref = f'refs/heads/{name}'
+        if os.path.isfile(os.path.join(self.common_dir, *ref.split('/'))):
+            return True
+        return ref in self._packed_refs()
+
+    def branch_names(self):
+        return sorted(name[len('refs/heads/'):] for name in self.refs if name.startswith('refs/heads/'))
+
+    def active_branch(self):
+        """Return the name of the checked out branch, or None when HEAD is detached."""
+        try:
+            return self.repo.active_branch.name
+        except TypeError:
+            return None
+
+    def read_blob(self, sha):
+        """Return a blob's bytes through the shared cat-file process."""
+        return self.repo.odb.stream(bytes.fromhex(sha)).read()
+
+    def ahead_behind(self, branch, base='HEAD'):
+        """Return (ahead, behind): commits only on branch, and only on base."""
+        behind, ahead = self._git('rev-list', '--left-right', '--count', f'{base}...{branch}').split()
+        return int(ahead), int(behind)
+
+    def merge_base(self, branch, base='HEAD'):
+        """Return the SHA of the best common ancestor, or None if the histories are unrelated."""
+        status, out, _ = self._git('merge-base', base, branch, with_extended_output=True, with_exceptions=False)
+        return out.strip() if status == 0 else None
+
+    def preview_merge(self, branch, base='HEAD'):
+        """
+        Computes a merge in the object database without touching the worktree or index.
+
+        Needs git 2.38+ for ``git merge-tree --write-tree``.
+
+        :return: MergePreview(clean, tree SHA, conflicting paths), or None when
+                 this git cannot do a worktree-free merge
+        """
+        status, out, _ = self._git('merge-tree', '--write-tree', '--name-only', '--no-messages', base, branch,
+                                   with_extended_output=True, with_exceptions=False)
+        if status not in (0, 1):
+            return None
+        lines = out.splitlines()
+        return MergePreview(status == 0, lines[0] if lines else None, lines[1:])
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# The package modules import each other as top-level modules.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'GitAssistant'))
+
+GIT_ENV = {
+    'GIT_AUTHOR_NAME': 'Test', 'GIT_AUTHOR_EMAIL': 'test@example.com',
+    'GIT_COMMITTER_NAME': 'Test', 'GIT_COMMITTER_EMAIL': 'test@example.com',
+    'GIT_CONFIG_NOSYSTEM': '1',
+}
+
+def git(repo, *args):
+    """Run git in repo and return its stripped stdout."""
+    env = dict(os.environ, HOME=str(repo), **GIT_ENV)
+    result = subprocess.run(['git', '-C', str(repo)] + list(args), env=env, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return result.stdout.strip()
+
+def write(repo, path, content):
+    full_path = os.path.join(str(repo), path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'w', newline='') as f:
+        f.write(content)
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """An empty git repository on branch main, with a committer identity for GitPython too."""
+    for name, value in GIT_ENV.items():
+        monkeypatch.setenv(name, value)
+    git(tmp_path, 'init', '-q', '-b', 'main')
+    git(tmp_path, 'config', 'user.name', 'Test')
+    git(tmp_path, 'config', 'user.email', 'test@example.com')
+    return tmp_path
@@ -0,0 +1,75 @@
+import json
+
+from cli import main
+from conftest import git, write
+
+def test_sarif_uris_are_percent_encoded(tmp_path):
+    repo = tmp_path / 'repo'
+    write(repo, 'my dir/fïle #1.py', 'API_KEY = "abcd1234"\n')
+    output = tmp_path / 'out.sarif'
+    assert main(['scan', str(repo), '--no-cache', '--workers', '1', '--format', 'sarif', '-o', str(output)]) == 1
+    [result] = json.loads(output.read_text())['runs'][0]['results']
+    uri = result['locations'][0]['physicalLocation']['artifactLocation']['uri']
+    assert uri == 'my%20dir/f%C3%AFle%20%231.py'
+
+def _profile(tmp_path, *argv):
+    report = tmp_path / 'profile.json'
+    main(list(argv) + ['-o', str(tmp_path / 'out'), '--profile-file', str(report)])
+    return json.loads(report.read_text())
+
+def test_profile_records_history_git_calls(repo, tmp_path):
+    write(repo, 'config.py', 'API_KEY = "abcd1234"\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'secret')
+    report = _profile(tmp_path, 'scan', str(repo), '--no-cache', '--workers', '1', '--history')
+    assert report['phases']['scan.history']['items'] == 1
+    commands = report['git']['commands']
+    assert (commands['log']['calls'], commands['log']['failures']) == (1, 0)
+    assert commands['cat-file']['calls'] >= 1
+
+def test_profile_records_diff_git_call(repo, tmp_path):
+    write(repo, 'config.py', 'API_KEY = "abcd1234"\n')
+    git(repo, 'add', '-A')
+    report = _profile(tmp_path, 'diff', str(repo))
+    assert report['git']['commands']['diff']['calls'] == 1
+    assert report['git']['commands']['diff']['failures'] == 0
+
+class _ClosedPipe:
+    """A stream whose reader goes away after the first write."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.writes > 1:
+            raise BrokenPipeError
+
+    def flush(self):
+        pass
+
+def test_pooled_scan_stops_when_the_output_is_closed(tmp_path, monkeypatch):
+    import threading
+
+    import cli
+
+    monkeypatch.setattr(cli, 'RESULT_QUEUE_SIZE', 1)
+    repos = []
+    for index in range(6):
+        repo = tmp_path / f'repo{index}'
+        write(repo, 'config.py', 'API_KEY = "abcd1234"\n' * 50)
+        repos.append(str(repo))
+    args = cli.build_parser().parse_args(['scan', '--no-cache', '--workers', '1', '--jobs', '2'] + repos)
+    raised = []
+
+    def scan():
+        try:
+            cli.run_scan(args, _ClosedPipe())
+        except BrokenPipeError as e:
+            raised.append(e)
+
+    thread = threading.Thread(target=scan, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert raised
@@ -0,0 +1,53 @@
+import pytest
+
+from conflict_resolver import STRATEGIES, ConflictHunk, ConflictParseError, parse_conflicts, resolve_file
+
+def test_plain_lines_and_two_way_hunk():
+    lines = ['a\n', '<<<<<<< HEAD\n', 'ours\n', '=======\n', 'theirs\n', '>>>>>>> other\n', 'z\n']
+    assert list(parse_conflicts(lines)) == ['a\n', ConflictHunk(['ours\n'], None, ['theirs\n']), 'z\n']
+
+def test_diff3_hunk_has_base():
+    lines = ['<<<<<<< HEAD\n', 'ours\n', '||||||| merged common ancestors\n', 'base\n', '=======\n',
+             'theirs\n', '>>>>>>> other\n']
+    assert list(parse_conflicts(lines)) == [ConflictHunk(['ours\n'], ['base\n'], ['theirs\n'])]
+
+def test_crlf_lines_are_kept_verbatim():
+    lines = ['a\r\n', '<<<<<<< HEAD\r\n', 'ours\r\n', '=======\r\n', 'theirs\r\n', '>>>>>>> other\r\n']
+    assert list(parse_conflicts(lines)) == ['a\r\n', ConflictHunk(['ours\r\n'], None, ['theirs\r\n'])]
+
+def test_unterminated_block_raises():
+    with pytest.raises(ConflictParseError):
+        list(parse_conflicts(['<<<<<<< HEAD\n', 'ours\n', '=======\n', 'theirs\n']))
+
+def test_marker_out_of_sequence_raises():
+    with pytest.raises(ConflictParseError):
+        list(parse_conflicts(['<<<<<<< HEAD\n', 'x\n', '=======\n', '<<<<<<< HEAD\n', '>>>>>>> other\n']))
+
+def test_marker_like_text_is_not_a_marker():
+    lines = ['<<<<<<<<< eight\n', '=======\n', '>>>>>>>x\n']
+    assert list(parse_conflicts(lines)) == lines
+
+def _write(tmp_path, content):
+    path = tmp_path / 'f.txt'
+    path.write_bytes(content.encode())
+    return path
+
+def test_resolve_file_keeps_crlf_and_rewrites(tmp_path):
+    path = _write(tmp_path, 'a\r\n<<<<<<< HEAD\r\nours\r\n=======\r\ntheirs\r\n>>>>>>> other\r\nz\r\n')
+    resolution = resolve_file(str(path), STRATEGIES['union'])
+    assert resolution.resolved and resolution.hunks == 1
+    assert path.read_bytes() == b'a\r\nours\r\ntheirs\r\nz\r\n'
+
+def test_resolve_file_refuses_to_leave_markers(tmp_path):
+    content = '<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> other\n>>>>>>> stray\n'
+    path = _write(tmp_path, content)
+    assert not resolve_file(str(path), STRATEGIES['ours']).resolved
+    assert path.read_text() == content
+    assert [p.name for p in tmp_path.iterdir()] == ['f.txt']
+
+def test_resolve_file_unresolved_hunk_leaves_file(tmp_path):
+    content = '<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> other\n'
+    path = _write(tmp_path, content)
+    resolution = resolve_file(str(path), lambda hunk: None)
+    assert resolution.hunks == 1 and not resolution.resolved
+    assert path.read_text() == content
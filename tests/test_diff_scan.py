@@ -0,0 +1,35 @@
+from conftest import git, write
+from diff_scan import iter_added_lines, iter_diff_findings
+
+def _summary(findings):
+    return sorted((finding.path, finding.rule, finding.line) for finding in findings)
+
+def test_staged_paths_are_reported_verbatim(repo):
+    write(repo, 'plain.py', 'x = 1\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'base')
+    write(repo, 'sp ace.py', 'x = 1\nPASSWORD = "hunter2"\n')
+    write(repo, 'q"uote.py', 'TOKEN = "tok_123"\n')
+    write(repo, 'back\\slash.py', 'API_KEY = "abcd1234"\n')
+    write(repo, 'ü.py', 'API_KEY = "abcd1234"\n')
+    git(repo, 'add', '-A')
+    assert _summary(iter_diff_findings(str(repo))) == [
+        ('back\\slash.py', 'api_key', 1), ('q"uote.py', 'token', 1),
+        ('sp ace.py', 'password', 2), ('ü.py', 'api_key', 1)]
+
+def test_quoted_and_tab_terminated_targets():
+    diff = [
+        'diff --git a/my file.py b/my file.py\n', '+++ b/my file.py\t\n', '@@ -0,0 +3 @@\n', '+one\n',
+        'diff --git "a/tab\\there" "b/tab\\there"\n', '+++ "b/tab\\there"\n', '@@ -0,0 +1 @@\n', '+two\n',
+        'diff --git "a/\\303\\251" "b/\\303\\251"\n', '+++ "b/\\303\\251"\n', '@@ -1 +1 @@\n', '+three\n',
+        'diff --git a/gone b/gone\n', '+++ /dev/null\n', '@@ -1 +0,0 @@\n', '-four\n',
+    ]
+    assert list(iter_added_lines(diff)) == [('my file.py', 3, 'one'), ('tab\there', 1, 'two'), ('é', 1, 'three')]
+
+def test_prefix_config_is_ignored(repo):
+    write(repo, 'config.py', 'API_KEY = "abcd1234efgh"\n')
+    git(repo, 'add', '-A')
+    for key in ('diff.noprefix', 'diff.mnemonicPrefix'):
+        git(repo, 'config', key, 'true')
+        assert _summary(iter_diff_findings(str(repo))) == [('config.py', 'api_key', 1)]
+        git(repo, 'config', '--unset', key)
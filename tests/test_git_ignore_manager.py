@@ -0,0 +1,34 @@
+import subprocess
+
+import pytest
+
+from conftest import write
+from git_ignore_manager import append_entries, escape_path, iter_unignored_files, suggest_entries
+from ignore_rules import parse_rule
+
+TRICKY_NAMES = ['[ab].key', 'foo*.pem', 'what?.env', '!bang.key', '#hash.key', 'back\\slash.key', 'my id_rsa  ']
+
+@pytest.mark.parametrize('name', TRICKY_NAMES)
+def test_escaped_entry_matches_only_its_file(name):
+    rule = parse_rule('/' + escape_path(name))
+    assert rule.regex.match(name)
+    assert not rule.regex.match('a.key')
+    assert not rule.regex.match('foo.pem')
+
+def test_written_entries_ignore_exactly_the_suggested_files(repo):
+    for name in TRICKY_NAMES + ['a.key', 'fooX.pem', 'main.py']:
+        write(repo, name, 'x\n')
+    entries = suggest_entries(iter_unignored_files(str(repo)), min_files=100)
+    assert len(entries) == len(TRICKY_NAMES) + 2
+    append_entries(str(repo), entries)
+
+    ignored = subprocess.run(['git', '-C', str(repo), 'ls-files', '-z', '--others', '--ignored', '--exclude-standard'],
+                             stdout=subprocess.PIPE, text=True, check=True).stdout.split('\0')[:-1]
+    assert sorted(ignored) == sorted(TRICKY_NAMES + ['a.key', 'fooX.pem'])
+    assert sorted(iter_unignored_files(str(repo))) == ['.gitignore', 'main.py']
+
+def test_collapses_into_glob_and_directory():
+    paths = ['src/a.py', 'certs/a.crt', 'certs/b.crt', 'certs/c.crt', 'keys/x.key', 'keys/y.key', 'keys/z.key',
+             'src/z.key', 'src/id_rsa']
+    entries = dict(suggest_entries(paths))
+    assert entries == {'*.crt': 3, '*.key': 4, '/src/id_rsa': 1}
@@ -0,0 +1,48 @@
+from conftest import git, write
+from history import iter_history_findings
+
+def _history(repo):
+    write(repo, 'ü.py', 'API_KEY = "abcd1234"\n')
+    write(repo, 'sp ace.py', 'PASSWORD = "hunter2"\n')
+    write(repo, 'q"uote.py', 'TOKEN = "tok_123"\n')
+    write(repo, 'plain.py', 'x = 1\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'secrets')
+    git(repo, 'rm', '-q', 'q"uote.py')
+    git(repo, 'commit', '-qm', 'remove')
+
+def _summary(findings):
+    return sorted((finding.path, finding.rule, finding.line) for finding in findings)
+
+EXPECTED = [('q"uote.py', 'token', 1), ('sp ace.py', 'password', 1), ('ü.py', 'api_key', 1)]
+
+def test_paths_are_reported_verbatim_including_deleted_files(repo):
+    _history(repo)
+    assert _summary(iter_history_findings(str(repo))) == EXPECTED
+
+def test_process_pool_finds_the_same_blobs(repo):
+    _history(repo)
+    assert _summary(iter_history_findings(str(repo), workers=2, batch_size=1)) == EXPECTED
+
+def _commit(repo, monkeypatch, message, day):
+    """Commit everything with a later date for each day, as commits on a real timeline."""
+    for name in ('GIT_AUTHOR_DATE', 'GIT_COMMITTER_DATE'):
+        monkeypatch.setenv(name, f'2024-01-{day:02d}T12:00:00Z')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', message)
+
+def test_blobs_are_attributed_to_the_commit_introducing_them(repo, monkeypatch):
+    write(repo, 'plain.py', 'x = 1\n')
+    _commit(repo, monkeypatch, 'base', 1)
+    git(repo, 'checkout', '-qb', 'f')
+    write(repo, 'config.py', 'API_KEY = "abcd1234"\n')
+    _commit(repo, monkeypatch, 'secret', 2)
+    introduced = git(repo, 'rev-parse', 'HEAD')
+    git(repo, 'checkout', '-q', 'main')
+    write(repo, 'other.py', 'y = 2\n')
+    _commit(repo, monkeypatch, 'other', 3)
+    monkeypatch.setenv('GIT_COMMITTER_DATE', '2024-01-04T12:00:00Z')
+    git(repo, 'merge', '-q', '--no-ff', '-m', 'merge f', 'f')
+    for workers in (1, 2):
+        [finding] = iter_history_findings(str(repo), workers=workers)
+        assert (finding.commit, finding.path) == (introduced, 'config.py')
@@ -0,0 +1,30 @@
+from ignore_rules import is_ignored, parse_gitignore, parse_rule
+
+def test_comments_blank_lines_and_trailing_spaces():
+    assert parse_rule('# comment') is None
+    assert parse_rule('   \n') is None
+    assert parse_rule('build   \n').regex.match('build')
+    assert parse_rule('name\\ \n').regex.match('name ')
+    assert parse_rule('\\#file').regex.match('#file')
+
+def test_anchoring_and_globs():
+    assert parse_rule('*.log').regex.match('deep/dir/x.log')
+    assert not parse_rule('/*.log').regex.match('deep/x.log')
+    assert parse_rule('doc/*.txt').regex.match('doc/a.txt')
+    assert not parse_rule('doc/*.txt').regex.match('doc/sub/a.txt')
+    assert parse_rule('doc/**/a.txt').regex.match('doc/x/y/a.txt')
+    assert parse_rule('file[0-9].py').regex.match('file7.py')
+    assert parse_rule('file[!0-9].py').regex.match('fileX.py')
+
+def test_negation_and_directory_only_rules():
+    levels = [('', parse_gitignore(['*.key', '!keep.key', 'out/']))]
+    assert is_ignored(levels, 'a.key')
+    assert not is_ignored(levels, 'keep.key')
+    assert is_ignored(levels, 'out', is_dir=True)
+    assert not is_ignored(levels, 'out')
+
+def test_nested_gitignore_applies_to_its_subtree():
+    levels = [('', parse_gitignore(['*.tmp'])), ('sub', parse_gitignore(['/local.txt']))]
+    assert is_ignored(levels, 'sub/local.txt')
+    assert not is_ignored(levels[:1], 'local.txt')
+    assert is_ignored(levels, 'sub/x.tmp')
@@ -0,0 +1,104 @@
+import os
+
+import scanner
+from conftest import git, write
+from detectors import build_engine
+from history import NULL_SHA
+from incremental import ScanCache, _blob_sha, hash_blob, iter_incremental_findings, ruleset_version
+
+def test_unreadable_file_is_not_cached_as_clean(repo, monkeypatch):
+    write(repo, 'a.py', 'API_KEY = "abcd1234"\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'add a.py')
+
+    read_file = scanner._scan_file
+    monkeypatch.setattr(scanner, '_scan_file', lambda *args: None)
+    assert list(iter_incremental_findings(str(repo), workers=1)) == []
+
+    monkeypatch.setattr(scanner, '_scan_file', read_file)
+    findings = list(iter_incremental_findings(str(repo), workers=1))
+    assert [finding.rule for finding in findings] == ['api_key']
+
+def _committed(repo, files):
+    for path, content in files.items():
+        write(repo, path, content)
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'files')
+
+def _count_scans(monkeypatch):
+    """Patch scanner._scan_file to record the paths actually scanned."""
+    scanned = []
+    scan_file = scanner._scan_file
+
+    def counting(path, *args):
+        scanned.append(os.path.basename(path))
+        return scan_file(path, *args)
+
+    monkeypatch.setattr(scanner, '_scan_file', counting)
+    return scanned
+
+def _summary(findings):
+    return sorted((os.path.basename(finding.path), finding.rule, finding.line) for finding in findings)
+
+def test_rerun_is_served_from_the_cache(repo, monkeypatch):
+    _committed(repo, {'a.py': 'API_KEY = "abcd1234"\n', 'b.py': 'x = 1\n', 'c.py': 'x = 1\n'})
+    scanned = _count_scans(monkeypatch)
+    first = _summary(iter_incremental_findings(str(repo), workers=1))
+    assert len(scanned) == 2 and 'a.py' in scanned   # b.py and c.py are one blob
+    del scanned[:]
+    assert _summary(iter_incremental_findings(str(repo), workers=1)) == first == [('a.py', 'api_key', 1)]
+    assert scanned == []
+
+    write(repo, 'b.py', 'PASSWORD = "hunter2"\n')
+    assert _summary(iter_incremental_findings(str(repo), workers=1)) == [('a.py', 'api_key', 1), ('b.py', 'password', 1)]
+    assert scanned == ['b.py']
+
+def test_ruleset_change_invalidates_the_cache(repo, monkeypatch):
+    _committed(repo, {'a.py': 'API_KEY = "abcd1234"\n'})
+    list(iter_incremental_findings(str(repo), workers=1))
+    scanned = _count_scans(monkeypatch)
+    patterns_only = build_engine(['patterns'])
+    assert ruleset_version(patterns_only) != ruleset_version()
+    assert _summary(iter_incremental_findings(str(repo), engine=patterns_only, workers=1)) == [('a.py', 'api_key', 1)]
+    assert scanned == ['a.py']
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    path = str(tmp_path / 'cache' / 'scan.sqlite3')
+    cache = ScanCache(path, 'v1', max_entries=2)
+    for sha in ('a', 'b', 'c'):
+        cache.put(sha, [])
+    assert set(cache.get_many(['a'])) == {'a'}
+    cache.close()
+    cache = ScanCache(path, 'v1', max_entries=2)
+    assert set(cache.get_many(['a', 'b', 'c'])) == {'a', 'c'}
+    cache.close()
+    cache = ScanCache(path, 'v2')
+    assert cache.get_many(['a', 'c']) == {}
+    cache.close()
+
+def test_racily_clean_files_are_hashed(tmp_path):
+    path = tmp_path / 'a.py'
+    path.write_text('x = 1\n')
+    st = os.stat(str(path))
+    actual = hash_blob(str(path), st.st_size)
+    stale = (NULL_SHA, st.st_mtime_ns, st.st_size)
+    assert _blob_sha(str(path), st, stale, st.st_mtime_ns + 1) == NULL_SHA
+    # Written in the same timestamp as the index: the index SHA cannot be trusted.
+    assert _blob_sha(str(path), st, stale, st.st_mtime_ns) == actual
+    assert _blob_sha(str(path), st, (NULL_SHA, st.st_mtime_ns, st.st_size + 1), st.st_mtime_ns + 1) == actual
+    assert _blob_sha(str(path), st, None, 0) == actual
+
+def test_unwritable_cache_falls_back_to_a_plain_scan(repo, tmp_path, monkeypatch):
+    import sqlite3
+
+    import incremental
+    from cli import EXIT_FINDINGS, main
+
+    _committed(repo, {'a.py': 'API_KEY = "abcd1234"\n'})
+    for error in (PermissionError(13, 'Permission denied'), sqlite3.OperationalError('attempt to write a readonly database')):
+        def unwritable(*args, **kwargs):
+            raise error
+        monkeypatch.setattr(incremental, 'ScanCache', unwritable)
+        output = tmp_path / 'out'
+        assert main(['scan', str(repo), '--workers', '1', '--format', 'ndjson', '-o', str(output)]) == EXIT_FINDINGS
+        assert 'api_key' in output.read_text()
@@ -0,0 +1,58 @@
+import os
+
+from conftest import git, write
+from cli import EXIT_ERROR, EXIT_FINDINGS, main
+from merge_helper import MERGED, NOT_MERGED, merge_branches
+
+def _conflicting_branches(repo, ours, theirs):
+    write(repo, 'doc.md', 'title\nline\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'base')
+    git(repo, 'checkout', '-qb', 'other')
+    write(repo, 'doc.md', theirs)
+    git(repo, 'commit', '-qam', 'theirs')
+    git(repo, 'checkout', '-q', 'main')
+    write(repo, 'doc.md', ours)
+    git(repo, 'commit', '-qam', 'ours')
+
+def test_resolved_merge_commit_has_both_parents(repo):
+    _conflicting_branches(repo, 'title\nours\n', 'title\ntheirs\n')
+    other = git(repo, 'rev-parse', 'other')
+    assert merge_branches(str(repo), 'other', interactive=False, strategies=[('*', 'union')]) == MERGED
+
+    parents = git(repo, 'rev-list', '--parents', '-n', '1', 'HEAD').split()[1:]
+    assert len(parents) == 2 and parents[1] == other
+    assert not os.path.exists(os.path.join(str(repo), '.git', 'MERGE_HEAD'))
+    assert git(repo, 'status', '--porcelain') == ''
+    assert (repo / 'doc.md').read_text() == 'title\nours\ntheirs\n'
+
+def test_stray_marker_aborts_non_interactive_merge(repo):
+    _conflicting_branches(repo, 'title\nours\n', 'title\ntheirs\n<<<<<<< x\n')
+    head = git(repo, 'rev-parse', 'HEAD')
+    assert merge_branches(str(repo), 'other', interactive=False, strategies=[('*', 'ours')]) == NOT_MERGED
+
+    assert git(repo, 'rev-parse', 'HEAD') == head
+    assert not os.path.exists(os.path.join(str(repo), '.git', 'MERGE_HEAD'))
+    assert git(repo, 'status', '--porcelain') == ''
+
+def test_cli_merge_errors_exit_2(repo, tmp_path_factory):
+    write(repo, 'doc.md', 'title\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'base')
+    assert main(['merge', str(repo), 'missing']) == EXIT_ERROR
+    plain = tmp_path_factory.mktemp('plain')
+    assert main(['merge', str(plain), 'main']) == EXIT_ERROR
+
+def test_cli_unresolved_merge_exits_1(repo):
+    _conflicting_branches(repo, 'title\nours\n', 'title\ntheirs\n')
+    assert main(['merge', str(repo), 'other']) == EXIT_FINDINGS
+
+def test_cli_merge_on_detached_or_unborn_head_exits_2(repo):
+    write(repo, 'doc.md', 'title\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'base')
+    git(repo, 'branch', 'other')
+    git(repo, 'checkout', '-q', '--detach')
+    assert main(['merge', str(repo), 'other']) == EXIT_ERROR
+    git(repo, 'checkout', '-q', '--orphan', 'unborn')
+    assert main(['merge', str(repo), 'other']) == EXIT_ERROR
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import metrics
+from cli import main
+from conftest import git, write
+from metrics import MAX_COMMAND, METRICS, Metrics
+
+class Clock:
+    """A perf_counter that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metrics.time, 'perf_counter', clock)
+    return clock
+
+@pytest.fixture
+def collector():
+    collector = Metrics()
+    collector.enable()
+    return collector
+
+def test_disabled_collector_records_nothing():
+    collector = Metrics()
+    items = [1, 2, 3]
+    assert collector.timed_iter('walk', items) is items
+    with collector.phase('phase'), collector.git_call(('status',)):
+        collector.count('files')
+    report = collector.report()
+    assert report['phases'] == {} and report['counters'] == {} and report['git']['calls'] == 0
+
+def test_timed_iter_counts_items_and_only_time_inside_the_iterator(collector, clock):
+    def slow_items():
+        for item in range(3):
+            clock.now += 1.0
+            yield item
+
+    for _ in collector.timed_iter('walk', slow_items()):
+        clock.now += 10.0   # The consumer's time is not counted.
+    assert collector.report()['phases']['walk'] == {'calls': 1, 'seconds': 3.0, 'items': 3}
+
+def test_git_call_counts_failures_and_reraises(collector, clock):
+    with collector.git_call(('status',)):
+        clock.now += 0.5
+    with pytest.raises(RuntimeError):
+        with collector.git_call(('merge', 'feature')):
+            clock.now += 2.0
+            raise RuntimeError('conflict')
+    git = collector.report()['git']
+    assert git['calls'] == 2 and git['seconds'] == 2.5
+    assert git['commands'] == {'merge': {'calls': 1, 'seconds': 2.0, 'failures': 1},
+                               'status': {'calls': 1, 'seconds': 0.5, 'failures': 0}}
+    assert git['slowest'] == [{'command': 'merge feature', 'seconds': 2.0}, {'command': 'status', 'seconds': 0.5}]
+
+def test_git_call_closed_early_by_its_consumer_is_not_a_failure(collector):
+    def streamed():
+        with collector.git_call(('log', '--all')):
+            yield from range(10)
+
+    lines = streamed()
+    next(lines)
+    lines.close()
+    assert collector.report()['git']['commands']['log']['failures'] == 0
+
+def test_report_keeps_the_slowest_and_truncates_commands(collector, clock):
+    for seconds in range(metrics.SLOWEST + 5):
+        collector.record_file(f'f{seconds}', float(seconds), 100)
+        with collector.git_call(('log', 'x' * 500, seconds)):
+            clock.now += seconds
+    collector.count('bytes_read', 7)
+    collector.count('bytes_read', 3)
+    report = collector.report()
+    assert report['counters'] == {'bytes_read': 10, 'files_scanned': metrics.SLOWEST + 5}
+    slowest = report['files']['slowest']
+    assert [entry['path'] for entry in slowest] == [f'f{seconds}' for seconds in range(metrics.SLOWEST + 4, 4, -1)]
+    assert len(report['git']['slowest']) == metrics.SLOWEST
+    assert all(len(entry['command']) == MAX_COMMAND for entry in report['git']['slowest'])
+
+def test_reset_clears_everything(collector, clock):
+    with collector.phase('total'), collector.git_call(('status',)):
+        collector.count('files')
+        collector.record_match('api_key')
+    collector.reset()
+    report = collector.report()
+    assert report['phases'] == {} and report['counters'] == {} and report['rules'] == {}
+    assert report['git']['calls'] == 0
+
+def test_profiled_cli_runs_are_reported_separately(repo, tmp_path):
+    write(repo, 'config.py', 'API_KEY = "abcd1234"\n')
+    git(repo, 'add', '-A')
+    reports = []
+    for run in range(2):
+        report = tmp_path / f'profile{run}.json'
+        main(['diff', str(repo), '-o', str(tmp_path / 'out'), '--profile-file', str(report)])
+        reports.append(json.loads(report.read_text()))
+        assert not METRICS.enabled
+    assert [report['git']['commands']['diff']['calls'] for report in reports] == [1, 1]
+    assert [report['phases']['total']['calls'] for report in reports] == [1, 1]
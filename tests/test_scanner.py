@@ -0,0 +1,85 @@
+import io
+import os
+
+import pytest
+
+import scanner
+from conftest import write
+from scanner import ENGINE, scan_file, scan_stream, scan_text, walk_files
+
+def _summary(findings):
+    return [(finding.rule, finding.line, finding.column) for finding in findings]
+
+def _stream(text, chunk_size, overlap=100):
+    return _summary(scan_stream(io.BytesIO(text.encode()), 'f', ENGINE, chunk_size=chunk_size, overlap=overlap))
+
+WRAPPED = [
+    ('PASSWORD =\n  "hunter2"\n', [('password', 1, 1)]),
+    ('API_KEY=\n"abc"\n', [('api_key', 1, 1)]),
+    ('password = "a\nb"\n', [('password', 1, 1)]),
+    ('const API_KEY =\n\n  "abc"\n', [('api_key', 1, 7)]),
+]
+
+@pytest.mark.parametrize('text, expected', WRAPPED)
+def test_matches_may_run_on_into_the_next_line(text, expected):
+    assert _summary(scan_text(text, 'f')) == expected
+
+@pytest.mark.parametrize('text, expected', WRAPPED)
+def test_wrapped_matches_are_found_across_chunks(text, expected):
+    for chunk_size in (1, 2, 3, 5, 8):
+        assert _stream(text, chunk_size) == expected
+
+def test_stream_agrees_with_scan_text_for_any_chunk_size():
+    lines = ['x = 1', 'API_KEY = "abcd1234"', 'naïve = "é" # PASSWORD = "pw"', '', 'TOKEN="t"; mail me@corp.io',
+             'PASSWORD =', '    "wrapped"', 'ghp_' + 'a1' * 18, 'y' * 40]
+    text = '\n'.join(lines * 3) + '\nAPI_KEY = "last"'
+    expected = _summary(scan_text(text, 'f'))
+    assert len(expected) == 19
+    for chunk_size in range(1, 60):
+        assert _stream(text, chunk_size) == expected, chunk_size
+
+def test_long_line_split_finds_matches_across_the_split():
+    secret = 'API_KEY = "abcd1234"'
+    text = ''.join(('z' * 37 + ' ' + secret + ' ') for _ in range(40))   # one 2.4 kB line
+    expected = _summary(scan_text(text, 'f'))
+    assert len(expected) == 40
+    for chunk_size in (16, 64, 100, 256):
+        assert _stream(text, chunk_size, overlap=32) == expected, chunk_size
+
+def test_binary_large_and_unreadable_files_are_skipped(tmp_path):
+    secret = b'API_KEY = "abcd1234"\n'
+    text_file = tmp_path / 'a.py'
+    text_file.write_bytes(secret)
+    binary = tmp_path / 'a.bin'
+    binary.write_bytes(b'\0' + secret)
+    assert _summary(scan_file(str(text_file))) == [('api_key', 1, 1)]
+    assert scan_file(str(binary)) == []
+    assert scan_file(str(text_file), max_file_size=len(secret) - 1) == []
+    assert scan_file(str(text_file), max_file_size=None) != []
+    assert scan_file(str(tmp_path / 'missing.py')) is None
+
+def test_walk_prunes_ignored_and_skipped_directories(tmp_path, monkeypatch):
+    for path in ('a.py', 'debug.log', 'build/out.py', 'node_modules/x.js', '.git/config',
+                 'sub/secret.txt', 'sub/keep.log', 'sub/deep/only_here.txt', 'sub/only_here.txt',
+                 'other/secret.txt'):
+        write(tmp_path, path, 'x\n')
+    write(tmp_path, '.gitignore', 'build/\n*.log\n')
+    write(tmp_path, 'sub/.gitignore', 'secret.txt\n!keep.log\n/only_here.txt\n')
+
+    listed = []
+    scandir = scanner.os.scandir
+
+    def recording_scandir(path):
+        listed.append(os.path.relpath(path, str(tmp_path)))
+        return scandir(path)
+
+    monkeypatch.setattr(scanner.os, 'scandir', recording_scandir)
+    walked = sorted(os.path.relpath(path, str(tmp_path)).replace(os.sep, '/') for path in walk_files(str(tmp_path)))
+    assert walked == ['.gitignore', 'a.py', 'other/secret.txt', 'sub/.gitignore', 'sub/deep/only_here.txt',
+                      'sub/keep.log']
+    assert sorted(listed) == ['.', 'other', 'sub', os.path.join('sub', 'deep')]
+
+    unfiltered = sorted(os.path.relpath(path, str(tmp_path)).replace(os.sep, '/')
+                        for path in walk_files(str(tmp_path), honor_gitignore=False))
+    assert 'build/out.py' in unfiltered and 'debug.log' in unfiltered
+    assert not any(path.startswith(('.git/', 'node_modules/')) for path in unfiltered)
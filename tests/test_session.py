@@ -0,0 +1,44 @@
+import session as session_module
+from conftest import git, write
+from merge_helper import current_active_branch, open_session
+from session import GitSession
+
+def _commit(repo):
+    write(repo, 'a.txt', 'a\n')
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-qm', 'a')
+
+def test_refs_follow_branch_changes_loose_and_packed(repo):
+    _commit(repo)
+    with GitSession(str(repo)) as session:
+        assert session.branch_names() == ['main']
+        git(repo, 'branch', 'feature/x')
+        assert session.branch_names() == ['feature/x', 'main']
+        assert session.has_branch('feature/x')
+        git(repo, 'pack-refs', '--all')
+        assert session.has_branch('feature/x') and session.branch_names() == ['feature/x', 'main']
+        git(repo, 'branch', '-D', 'feature/x')
+        assert not session.has_branch('feature/x')
+        assert session.branch_names() == ['main']
+
+def test_cached_refs_are_checked_without_listing_ref_files(repo, monkeypatch):
+    _commit(repo)
+    with GitSession(str(repo)) as session:
+        assert session.refs
+        def no_walk(*args, **kwargs):
+            raise AssertionError("refs/ was listed")
+        monkeypatch.setattr(session_module.os, 'walk', no_walk)
+        assert session.refs
+        assert session.has_branch('main') and not session.has_branch('missing')
+
+def test_sessions_opened_for_a_path_are_closed(repo, monkeypatch):
+    _commit(repo)
+    closed = []
+    monkeypatch.setattr(GitSession, 'close', lambda self: closed.append(self))
+    assert current_active_branch(str(repo)) == 'main'
+    assert len(closed) == 1
+
+    with GitSession(str(repo)) as owned:
+        with open_session(owned) as session:
+            assert session is owned
+        assert len(closed) == 1